@@ -1,14 +1,25 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g, Response
 from flask_cors import CORS
 import os
+import hmac
+import sqlite3
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, update
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import selectinload
 from flask_login import LoginManager, UserMixin, login_required, current_user
-import pandas as pd
-from fuzzywuzzy import fuzz, process
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from collections import Counter
+from inquiry_index import INQUIRY_MATCH_THRESHOLD
+from knowledge_base import KnowledgeBase
+from response_cache import ResponseCache
+from inquiry_classifier import InquiryClassifier
+import routing
+from routing import FREQUENT_WORDS_ERROR, STAGE_SECONDS
+import user_log
+import metrics
+from user_cache import UserCache
+import time
+from preprocessing import preprocess_text
 
 app = Flask(__name__)
 CORS(app)
@@ -17,10 +28,30 @@ CORS(app)
 app.secret_key = os.getenv("SECRET_KEY", "your_default_secret_key_here")
 
 # Database configuration
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///users.db'
+DATABASE_URL = os.getenv("DATABASE_URL", 'sqlite:///users.db')
+app.config['SQLALCHEMY_DATABASE_URI'] = DATABASE_URL
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Pooled connections shared across threads
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+    'pool_size': int(os.getenv("DB_POOL_SIZE", "10")),
+    'max_overflow': int(os.getenv("DB_MAX_OVERFLOW", "20")),
+    'pool_recycle': 3600,
+}
+# SQLite only: let pooled connections move between threads, and since SQLite serializes
+# writers, wait on the file lock rather than failing during kiosk-login bursts
+if DATABASE_URL.startswith('sqlite'):
+    app.config['SQLALCHEMY_ENGINE_OPTIONS']['connect_args'] = {'timeout': 15, 'check_same_thread': False}
 db = SQLAlchemy(app)
 
+# WAL lets preference reads proceed while a write is in progress
+@event.listens_for(Engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
 # Flask-Login setup
 login_manager = LoginManager()
 login_manager.init_app(app)
@@ -29,160 +60,256 @@ login_manager.init_app(app)
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
+    # Legacy comma-joined preferences, moved into user_favorite_food on first load
     favorite_foods = db.Column(db.String(200))
+    foods = db.relationship('UserFavoriteFood', order_by='UserFavoriteFood.position',
+                            cascade='all, delete-orphan', lazy='selectin')
+
+# One row per favorite food, in the user's order
+class UserFavoriteFood(db.Model):
+    __tablename__ = 'user_favorite_food'
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    position = db.Column(db.Integer, primary_key=True)
+    food = db.Column(db.String(80), nullable=False)
+
+# Create missing tables (e.g. user_favorite_food in an existing users.db). Run once before
+# serving: python api.py and uvicorn asgi:app do it at startup, for flask run or gunicorn
+# use flask --app api init-db
+def create_tables():
+    with app.app_context():
+        try:
+            db.create_all()
+        except OperationalError:
+            # Another worker created them at the same moment; the second pass finds them
+            db.create_all()
+
+@app.cli.command("init-db")
+def init_db_command():
+    create_tables()
+    print("Database tables created.")
+
+# Function to split the legacy comma-joined preferences
+def split_favorite_foods(favorite_foods):
+    return [food.strip() for food in (favorite_foods or '').split(',') if food.strip()]
+
+# Detached, read-only view of a user that can be cached and shared between requests
+class SessionUser(UserMixin):
+    def __init__(self, user):
+        self.id = user.id
+        self.username = user.username
+        # Not migrated yet (see migrate_favorite_foods): the legacy column still holds them
+        self.favorite_foods = tuple(food.food for food in user.foods) or tuple(split_favorite_foods(user.favorite_foods))
+
+def set_favorite_foods(user, foods):
+    user.foods = [UserFavoriteFood(position=position, food=food) for position, food in enumerate(foods)]
+    user.favorite_foods = None
+
+# Function to move a user's legacy comma-joined preferences into user_favorite_food.
+# Concurrent first logins race for it: only the request whose UPDATE still finds the
+# legacy value inserts the rows, the others roll back and read what it wrote.
+def migrate_favorite_foods(user):
+    user_id, legacy = user.id, user.favorite_foods
+    try:
+        claimed = db.session.execute(
+            update(User).where(User.id == user_id, User.favorite_foods == legacy).values(favorite_foods=None),
+            execution_options={"synchronize_session": False}).rowcount
+        if claimed:
+            db.session.add_all([UserFavoriteFood(user_id=user_id, position=position, food=food)
+                                for position, food in enumerate(split_favorite_foods(legacy))])
+        db.session.commit()
+    except (IntegrityError, OperationalError):
+        db.session.rollback()
+    # Commit and rollback both expire the user, so the next access reloads both columns
+
+# Function to load a user with their preferences in one round trip, migrating the legacy column
+def fetch_session_user(user_id):
+    user = db.session.get(User, user_id, options=[selectinload(User.foods)])
+    if user is None:
+        return None
+    if user.favorite_foods and not user.foods:
+        migrate_favorite_foods(user)
+    return SessionUser(user)
 
+user_cache = UserCache()
+
+# flask_login memoizes the loaded user for the rest of the request, and the cache
+# serves repeat logins from memory until the TTL expires or preferences change.
+# A preferences update only invalidates the worker that handled it; other workers
+# keep serving their copy for up to USER_CACHE_TTL seconds.
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
-
-# Load inquiries and responses from CSV
-stop_words = set(stopwords.words('english'))
-
-# Function to preprocess text by removing stopwords
-def preprocess_text(text):
-    tokens = word_tokenize(text.lower())  # Tokenize and convert to lowercase
-    return [word for word in tokens if word.isalpha() and word not in stop_words]
-
-# Function to identify frequently occurring words in the CSV questions
-def get_frequent_words(df, threshold=5):
-    word_count = Counter()
-    
-    for question in df['Question']:
-        words = preprocess_text(question)
-        word_count.update(words)
-
-    # Filter out words that occur more than a certain threshold
-    frequent_words = {word for word, count in word_count.items() if count >= threshold}
-    return frequent_words
-
-# Load and preprocess inquiries from CSV
-def load_inquiries(file_path):
-    try:
-        df = pd.read_csv(file_path)
-        df['Question'] = df['Question'].str.strip()
-
-        # Preprocess the questions and remove frequent words
-        frequent_words = get_frequent_words(df)
-        df['Processed Question'] = df['Question'].apply(lambda x: ' '.join([word for word in preprocess_text(x) if word not in frequent_words]))
+    return user_cache.get_or_load(int(user_id), timed_fetch_session_user)
 
-        inquiries_dict = dict(zip(df['Processed Question'].str.lower(), df['Response']))
-        print("Frequent words:", frequent_words)
-        return inquiries_dict, frequent_words
-    except Exception as e:
-        print(f"Error loading inquiries: {e}")
-        return {}, set()
+def timed_fetch_session_user(user_id):
+    with DB_SECONDS.time("load_user"):
+        return fetch_session_user(user_id)
 
-# Store the inquiry responses from CSV
-inquiry_responses, frequent_words = load_inquiries('inquiries.csv')
+# Knowledge base: inquiry table (from the prebuilt, memory-mapped artifact) and
+# intent tables from intents.json. Edits to either file are picked up by a
+# background poller and swapped in without restarting workers.
+knowledge_base = KnowledgeBase('inquiries.csv', 'intents.json')
 
 # Ensure frequent_words is correctly initialized before using it in match_inquiry function
-if not frequent_words:
+if not knowledge_base.current.frequent_words:
     print("Error: frequent_words is empty or not loaded properly.")
 
-# Function to perform fuzzy matching between user input and CSV questions
-def match_inquiry(user_input):
-    # Preprocess the user input
-    if not frequent_words:
-        return "Error: Frequent words not loaded properly"
-    
-    user_input_processed = ' '.join([word for word in preprocess_text(user_input) if word not in frequent_words])
-    
-    # Perform fuzzy matching
-    best_match, score = process.extractOne(user_input_processed.lower(), inquiry_responses.keys(), scorer=fuzz.token_set_ratio)
-    if score >= 75:
-        return inquiry_responses[best_match]
-    else:
-        return None
+@app.before_request
+def start_knowledge_base_polling():
+    knowledge_base.ensure_polling()
+
+# Hot-path metrics, exposed in the Prometheus text format on /metrics
+REQUEST_SECONDS = metrics.histogram("http_request_duration_seconds", "Flask request latency",
+                                    ("endpoint", "method", "status"))
+ROUTED_TOTAL = metrics.counter("voice_order_routed_total", "Inputs routed, by intent and answering stage",
+                               ("intent", "path"))
+PATH_SECONDS = metrics.histogram("voice_order_path_seconds", "Routing latency by answering stage", ("path",))
+INTENT_SECONDS = metrics.histogram("voice_order_intent_seconds", "Routing latency by intent", ("intent",))
+DB_SECONDS = metrics.histogram("db_query_seconds", "User database operations", ("operation",))
+
+@app.before_request
+def start_request_metrics():
+    if metrics.ENABLED:
+        g.request_started = time.perf_counter()
+    # Sampling profile of this request, on demand (needs METRICS_PROFILING=1 and the admin token)
+    if metrics.PROFILING_ENABLED and request.headers.get('X-Profile') == '1' and admin_authorized():
+        g.profiler = metrics.SamplingProfiler().start()
+
+@app.after_request
+def finish_request_metrics(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        REQUEST_SECONDS.observe(time.perf_counter() - started, request.endpoint or "unmatched", request.method,
+                                response.status_code)
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.stop()
+        response.headers['X-Profile-Id'] = metrics.profiles.add(profiler.collapsed())
+        response.headers['X-Profile-Samples'] = str(profiler.samples)
+    return response
 
-INTENT_KEYWORDS = {
-    "Room Service Order": ["order", "food", "room service", "meal", "menu", "snack", "drink", "coffee", "tea", "breakfast", "lunch", "dinner"],
-    "Amenities Request": ["towel", "pillows", "extra blanket", "bathroom", "toiletries", "shampoo", "soap", "hair dryer", "robe"],
-    "Food Inquiry": ["ice cream", "food", "meal", "snack", "dessert", "order food", "can I get food", "menu", "available food", "specials", "what's for dinner"],
-    "Feedback or Complaint": ["complaint", "feedback", "issue", "problem", "cold", "hot", "broken", "not working", "too loud", "uncomfortable"],
-    "Reservation Request": ["reserve", "booking", "reservation", "room", "book a room", "availability", "room booking", "confirm reservation"],
-    "Check-In/Check-Out Request": ["check-in", "check-out", "checkin", "checkout", "time", "arrivals", "departure", "when is check-in", "when is check-out"],
-    "Parking Inquiry": ["parking", "space", "available", "park", "parking fee", "parking available", "where to park"],
-    "General Inquiry": ["what", "how", "where", "is", "can", "please", "help", "do you have", "what time", "how much", "how to", "how does it work"],
-    "Yes/No Response": ["yes", "no", "yeah", "nope", "yup", "nah", "correct", "incorrect", "sure", "no thanks", "maybe"],
-    "Greeting": ["hi", "hello", "hey", "good morning", "good afternoon", "good evening", "how are you", "good day", "welcome", "greetings"],
-    "Cancellation or Modification": ["cancel", "modify", "change", "alter", "adjust", "reschedule", "cancel reservation", "change booking"],
-    "Special Request": ["special request", "extra service", "personal request", "room preference", "need help", "special arrangement"],
-    "Maintenance Request": ["broken", "repair", "leak", "damaged", "fix", "maintenance", "malfunction", "problem with", "faulty"],
-    "Housekeeping Request": ["cleaning", "housekeeping", "tidy up", "make the bed", "room cleaning", "change the sheets", "vacuum", "clean the bathroom"],
-    "Payment/Invoice Request": ["bill", "invoice", "payment", "charge", "receipt", "how much", "total cost", "pay for", "room charges", "bill for the stay"],
-    "Staff Assistance Request": ["help", "assist", "staff", "can you help", "please assist", "need assistance", "staff available"],
-    "Lost and Found": ["lost", "found", "missing", "lost item", "found item", "where is my", "where did I leave"],
-    "Local Information Request": ["nearby", "attractions", "restaurant", "tourist spots", "local", "near", "places to visit", "local area", "activities nearby"],
-    "Event or Conference Room": ["conference room", "meeting room", "event space", "book a conference room", "reserve a meeting room", "event booking"]
-}
+# Function to strip stopwords and frequent words from the user input
+def process_inquiry_input(user_input, snapshot=None):
+    snapshot = snapshot or knowledge_base.current
+    return ' '.join([word for word in preprocess_text(user_input) if word not in snapshot.frequent_words])
 
-INTENT_RESPONSES = {
-    "Room Service Order": "Thank you for your order! Your food will be delivered shortly.",
-    "Amenities Request": "Your request for additional amenities has been noted and will be sent to your room soon.",
-    "Food Inquiry": "Ice cream sounds great! Let me place that order for you right away. What flavor would you like?",
-    "Feedback or Complaint": "We're sorry to hear that. Could you please provide more details about the issue?",
-    "Reservation Request": "Your reservation request is being processed. We'll confirm your booking shortly.",
-    "Check-In/Check-Out Request": "Your check-in/check-out request has been noted. Please proceed to the front desk for further assistance.",
-    "Parking Inquiry": "Yes, parking is available for guests. There is a daily parking fee of $10.",
-    "General Inquiry": "How can I assist you today? Please feel free to ask any questions you may have.",
-    "Yes/No Response": "Thank you for your response!",
-    "Greeting": "Hello! How can I assist you today?",
-    "Cancellation or Modification": "Your request to cancel or modify the reservation will be processed shortly.",
-    "Special Request": "We will take care of your special request. Please let us know if there's anything else you need.",
-    "Maintenance Request": "We're sorry to hear that! Our maintenance team will attend to the issue shortly.",
-    "Housekeeping Request": "Housekeeping will be sent to your room to take care of your request.",
-    "Payment/Invoice Request": "Your bill will be provided shortly. Let us know if you need any further assistance with the payment.",
-    "Staff Assistance Request": "Our staff is here to help. How can we assist you today?",
-    "Lost and Found": "Please provide details about the item you lost, and we'll check if it has been found.",
-    "Local Information Request": "I can provide information about local attractions. What kind of activities are you interested in?",
-    "Event or Conference Room": "I will reserve a conference room for you. Could you please provide more details about the event?"
-}
+# Function to return the top-k (question, response, score) matches for the user input
+def match_inquiry_scored(user_input, k=1, snapshot=None):
+    snapshot = snapshot or knowledge_base.current
+    return snapshot.inquiry_index.search(process_inquiry_input(user_input, snapshot), k=k)
 
-# Function to determine intent based on keywords
-def determine_intent(user_input):
-    user_input = user_input.lower()
+# Function to perform fuzzy matching between user input and CSV questions
+def match_inquiry(user_input, snapshot=None):
+    snapshot = snapshot or knowledge_base.current
 
-    inquiry_response = match_inquiry(user_input)
-    if inquiry_response:
-        return "Inquiry", inquiry_response
+    # Preprocess the user input
+    if not snapshot.frequent_words:
+        return FREQUENT_WORDS_ERROR
 
-    # Check for greeting keywords
-    if any(keyword in user_input for keyword in INTENT_KEYWORDS["Greeting"]):
-        return "Greeting", "Hello! How can I assist you today?"
+    return snapshot.inquiry_index.match(process_inquiry_input(user_input, snapshot), threshold=INQUIRY_MATCH_THRESHOLD)
 
-    # Check for yes/no keywords
-    if any(keyword in user_input for keyword in INTENT_KEYWORDS["Yes/No Response"]):
-        return "Yes/No", "Thank you for your response!"
+# Cache of routed responses for repeated utterances, keyed on the normalized input
+response_cache = ResponseCache()
 
-    # Check for feedback or complaint specifically
-    if any(keyword in user_input for keyword in INTENT_KEYWORDS["Feedback or Complaint"]):
-        return "Feedback or Complaint", "We're sorry to hear that. Could you please provide more details about the issue?"
+# Trained inquiry classifier; confident predictions skip the fuzzy match. Loaded here so
+# the first request doesn't pay for it; a model that can't reach the threshold isn't loaded.
+inquiry_classifier = InquiryClassifier()
+inquiry_classifier.load()
 
-    # Check for keyword matches for predefined intents
-    for intent, keywords in INTENT_KEYWORDS.items():
-        if intent not in ["Greeting", "Yes/No Response", "Feedback or Complaint"] and any(keyword in user_input for keyword in keywords):
-            return intent, INTENT_RESPONSES.get(intent, "I'm sorry, I didn't quite understand your request.")
+# Largest number of inputs accepted by the batch endpoint
+MAX_BATCH_INPUTS = 1000
 
-    return "Unknown", "I'm sorry, I didn't quite understand your request."
+# Function to determine intent based on keywords
+def determine_intent(user_input):
+    intent, response, score, path = determine_intent_batch([user_input])[0]
+    return intent, response
+
+# Function to determine (intent, response, match score, path) for many inputs at once
+# (see routing.determine_intent_batch). snapshot, classifier and cache default to the
+# served ones; one snapshot is used for the whole request, even if a reload swaps in a new one.
+def determine_intent_batch(user_inputs, snapshot=None, classifier=None, cache=None):
+    return routing.determine_intent_batch(user_inputs,
+                                          snapshot if snapshot is not None else knowledge_base.current,
+                                          classifier if classifier is not None else inquiry_classifier,
+                                          cache if cache is not None else response_cache)
 
 # Function to handle user input and generate a response
 def handle_user_input(user_input):
     intent, response = determine_intent(user_input)
     return response
 
+# Function to route one voice-order input, returning (response data, path, elapsed ms)
+def process_voice_order(user_input):
+    started = time.perf_counter()
+    intent, response, score, path = determine_intent_batch([user_input])[0]
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    # Record which stage answered and how long it took
+    ROUTED_TOTAL.inc(intent, path)
+    PATH_SECONDS.observe(elapsed_ms / 1000, path)
+    INTENT_SECONDS.observe(elapsed_ms / 1000, intent)
+    with STAGE_SECONDS.time("log"):
+        user_log.log_interaction(user_input, intent, None, response, path=path, elapsed_ms=elapsed_ms)
+
+    # Create response data
+    response_data = {
+        "response": response
+    }
+    return response_data, path, elapsed_ms
+
+# Function to validate the batch endpoint's inputs, returning an error message or None
+def batch_inputs_error(user_inputs):
+    if not user_inputs or not isinstance(user_inputs, list):
+        return "No inputs provided"
+    if len(user_inputs) > MAX_BATCH_INPUTS:
+        return f"At most {MAX_BATCH_INPUTS} inputs per batch"
+    if not all(isinstance(user_input, str) and user_input for user_input in user_inputs):
+        return "Every input must be a non-empty string"
+    return None
+
+# Function to route a batch of inputs, returning the response data
+def process_voice_order_batch(user_inputs, with_sentiment=False):
+    started = time.perf_counter()
+    results = determine_intent_batch(user_inputs)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    for intent, response, score, path in results:
+        ROUTED_TOTAL.inc(intent, path)
+
+    # Sentiment is optional since it needs the transformer model
+    sentiments = [(None, None)] * len(user_inputs)
+    if with_sentiment:
+        from sentiment_analysis import analyze_sentiment_batch
+        with STAGE_SECONDS.time("sentiment"):
+            sentiments = analyze_sentiment_batch(user_inputs)
+
+    return {
+        "results": [
+            {"input": user_input, "intent": intent, "response": response, "score": score, "path": path,
+             "sentiment": sentiment, "sentiment_score": sentiment_score}
+            for user_input, (intent, response, score, path), (sentiment, sentiment_score) in zip(user_inputs, results, sentiments)
+        ],
+        "elapsed_ms": round(elapsed_ms, 2)
+    }
+
 @app.route('/api/voice-order', methods=['POST'])
 def voice_order():
     user_input = request.json.get('input')
     if not user_input:
         return jsonify({"error": "No input provided"}), 400
 
-    response = handle_user_input(user_input)
-    
-    # Create response data
-    response_data = {
-        "response": response
-    }
-    return jsonify(response_data)
+    response_data, path, elapsed_ms = process_voice_order(user_input)
+    result = jsonify(response_data)
+    result.headers['X-Response-Path'] = path
+    result.headers['Server-Timing'] = f'intent;dur={elapsed_ms:.2f}'
+    return result
+
+@app.route('/api/voice-order/batch', methods=['POST'])
+def voice_order_batch():
+    user_inputs = request.json.get('inputs')
+    error = batch_inputs_error(user_inputs)
+    if error:
+        return jsonify({"error": error}), 400
+
+    return jsonify(process_voice_order_batch(user_inputs, bool(request.json.get('sentiment'))))
 
 @app.route('/api/feedback', methods=['POST'])
 def feedback():
@@ -192,14 +319,88 @@ def feedback():
 
     return jsonify({"message": "Thank you for your feedback!"}), 200
 
+# Admin token required by the admin endpoints; without ADMIN_TOKEN they are disabled
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+def admin_token_valid(token):
+    return bool(ADMIN_TOKEN) and token is not None and hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
+def admin_authorized():
+    return admin_token_valid(request.headers.get('X-Admin-Token'))
+
+@app.route('/api/admin/knowledge-base', methods=['GET'])
+def knowledge_base_status():
+    if not admin_authorized():
+        return jsonify({"error": "Unauthorized"}), 401
+    return jsonify(knowledge_base.current.describe())
+
+@app.route('/api/admin/knowledge-base/reload', methods=['POST'])
+def knowledge_base_reload():
+    if not admin_authorized():
+        return jsonify({"error": "Unauthorized"}), 401
+    force = request.args.get('force', '').lower() in ('1', 'true', 'yes')
+    reloaded = knowledge_base.reload(force=force)
+    return jsonify({"reloaded": reloaded, **knowledge_base.current.describe()})
+
+@app.route('/api/admin/response-cache', methods=['GET', 'DELETE'])
+def response_cache_status():
+    if not admin_authorized():
+        return jsonify({"error": "Unauthorized"}), 401
+    if request.method == 'DELETE':
+        response_cache.clear()
+    return jsonify(response_cache.stats())
+
+@app.route('/api/admin/user-cache', methods=['GET', 'DELETE'])
+def user_cache_status():
+    if not admin_authorized():
+        return jsonify({"error": "Unauthorized"}), 401
+    if request.method == 'DELETE':
+        user_cache.clear()
+    return jsonify(user_cache.stats())
+
+# Cache sizes and hit counts, reported at scrape time
+def cache_gauges():
+    gauges = {}
+    for name, stats in (("response_cache", response_cache.stats()), ("user_cache", user_cache.stats())):
+        for key in ("entries", "hits", "misses", "evictions"):
+            if key in stats:
+                gauges.setdefault(f"{name}_{key}", (f"{name} {key}", []))[1].append(({}, stats[key]))
+    return gauges
+
+metrics.register_collector(cache_gauges)
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/admin/profile/<profile_id>', methods=['GET'])
+def profile_status(profile_id):
+    if not admin_authorized():
+        return jsonify({"error": "Unauthorized"}), 401
+    profile = metrics.profiles.get(profile_id)
+    if profile is None:
+        return jsonify({"error": "Profile not found"}), 404
+    return Response(profile, mimetype='text/plain')
+
 @app.route('/api/user/preferences', methods=['GET'])
 @login_required
 def get_user_preferences():
-    user_id = current_user.id
-    user = User.query.get(user_id)
-    return jsonify({"favorite_foods": user.favorite_foods.split(',') if user.favorite_foods else []})
+    return jsonify({"favorite_foods": list(current_user.favorite_foods)})
+
+@app.route('/api/user/preferences', methods=['PUT'])
+@login_required
+def update_user_preferences():
+    foods = request.json.get('favorite_foods')
+    if not isinstance(foods, list) or not all(isinstance(food, str) and food.strip() for food in foods):
+        return jsonify({"error": "favorite_foods must be a list of non-empty strings"}), 400
+
+    with DB_SECONDS.time("update_preferences"):
+        user = db.session.get(User, current_user.id)
+        set_favorite_foods(user, [food.strip() for food in foods])
+        db.session.commit()
+    user_cache.invalidate(user.id)
+    return jsonify({"favorite_foods": [food.strip() for food in foods]})
 
 if __name__ == "__main__":
-    with app.app_context():
-        db.create_all()
+    create_tables()
     app.run(debug=True)
@@ -0,0 +1,202 @@
+import os
+import time
+import asyncio
+import contextlib
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.exceptions import HTTPException
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse
+from starlette.routing import Route, Mount
+
+import api
+import metrics
+
+# Async serving mode: uvicorn asgi:app --workers N
+#
+# /api/voice-order, its batch variant and /api/feedback are served natively with
+# the same request/response contracts as the Flask routes. The CPU-bound NLP stages
+# run in a bounded pool, so idle kiosk connections only cost a coroutine. Every
+# other route (user preferences, admin) is passed to the Flask app through its own
+# small thread pool, so cheap endpoints are never queued behind NLP work.
+
+# "thread" (default) or "process" for the NLP pool. With "process", routing runs in
+# child processes: their metrics, response cache and interaction logs stay in those
+# processes, so /metrics, the admin cache endpoints and the parent's log writer never
+# see them. Use it only for throughput experiments, not for an instrumented deployment.
+EXECUTOR_KIND = os.getenv("ASGI_EXECUTOR", "thread")
+NLP_WORKERS = int(os.getenv("ASGI_NLP_WORKERS", str(os.cpu_count() or 4)))
+WSGI_WORKERS = int(os.getenv("ASGI_WSGI_WORKERS", "10"))
+
+# Per-route (max concurrent requests, timeout in seconds)
+ROUTE_LIMITS = {
+    "voice-order": (int(os.getenv("VOICE_ORDER_CONCURRENCY", "64")), float(os.getenv("VOICE_ORDER_TIMEOUT", "5"))),
+    "voice-order-batch": (int(os.getenv("BATCH_CONCURRENCY", "4")), float(os.getenv("BATCH_TIMEOUT", "60"))),
+}
+
+if EXECUTOR_KIND == "process":
+    executor = ProcessPoolExecutor(max_workers=NLP_WORKERS)
+else:
+    executor = ThreadPoolExecutor(max_workers=NLP_WORKERS, thread_name_prefix="nlp")
+
+route_semaphores = {name: asyncio.Semaphore(limit) for name, (limit, _) in ROUTE_LIMITS.items()}
+
+# Per-request profiling state for the native routes: None, or a dict that run_limited
+# fills with the profile of the pool job
+request_profile = contextvars.ContextVar("request_profile", default=None)
+
+
+# Function to time a native route like Flask's before/after_request hooks do, and to honour
+# X-Profile (with METRICS_PROFILING=1 and the admin token). The profile covers the route's
+# pool job, where its work runs, so routes that submit no job return no profile.
+def instrumented(endpoint):
+    def decorate(handler):
+        @functools.wraps(handler)
+        async def wrapper(request):
+            started = time.perf_counter() if metrics.ENABLED else None
+            profile = None
+            if (metrics.PROFILING_ENABLED and request.headers.get('X-Profile') == '1'
+                    and api.admin_token_valid(request.headers.get('X-Admin-Token'))):
+                profile = {}
+            request_profile.set(profile)
+
+            status = 500
+            try:
+                response = await handler(request)
+                status = response.status_code
+            except HTTPException as e:
+                status = e.status_code
+                raise
+            finally:
+                if started is not None:
+                    api.REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint, request.method, status)
+
+            if profile:
+                response.headers['X-Profile-Id'] = metrics.profiles.add(profile["collapsed"])
+                response.headers['X-Profile-Samples'] = str(profile["samples"])
+            return response
+        return wrapper
+    return decorate
+
+
+# Function to read the JSON body the way Flask's request.json does
+async def read_json(request):
+    if request.headers.get("content-type", "").split(";")[0].strip() != "application/json":
+        raise HTTPException(415, "Did not attempt to load JSON data because the request Content-Type was not 'application/json'.")
+    try:
+        payload = await request.json()
+    except ValueError:
+        raise HTTPException(400, "Failed to decode JSON object")
+    if not isinstance(payload, dict):
+        raise HTTPException(400, "Expected a JSON object")
+    return payload
+
+
+# Function to release a route's slot from the pool's thread once its job has finished
+def release_when_done(loop, semaphore):
+    def release(_):
+        try:
+            loop.call_soon_threadsafe(semaphore.release)
+        except RuntimeError:
+            pass  # the event loop is already closed (shutdown)
+    return release
+
+
+# Function to run a CPU-bound call in the NLP pool under the route's concurrency limit and timeout.
+# A slot is held until the job itself finishes, not until the request gives up on it, so
+# the limit bounds the work queued in the pool. A timed-out job that hasn't started yet is
+# cancelled; one that is already running keeps its slot until it returns.
+async def run_limited(route, func, *args):
+    semaphore = route_semaphores[route]
+    _, timeout = ROUTE_LIMITS[route]
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+
+    try:
+        await asyncio.wait_for(semaphore.acquire(), timeout)
+    except asyncio.TimeoutError:
+        return None, JSONResponse({"error": "Server busy, please retry"}, status_code=503)
+    profile = request_profile.get()
+    try:
+        job = executor.submit(metrics.profiled_call, func, *args) if profile is not None else executor.submit(func, *args)
+    except Exception:
+        semaphore.release()
+        raise
+    job.add_done_callback(release_when_done(loop, semaphore))
+
+    try:
+        # Cancelling the wrapper on timeout also cancels the job if it is still queued
+        result = await asyncio.wait_for(asyncio.wrap_future(job), max(deadline - loop.time(), 0))
+        if profile is not None:
+            result, profile["collapsed"], profile["samples"] = result
+        return result, None
+    except asyncio.TimeoutError:
+        return None, JSONResponse({"error": "Request timed out"}, status_code=504)
+
+
+@instrumented("voice_order")
+async def voice_order(request):
+    payload = await read_json(request)
+    user_input = payload.get('input')
+    if not user_input:
+        return JSONResponse({"error": "No input provided"}, status_code=400)
+
+    result, error = await run_limited("voice-order", api.process_voice_order, user_input)
+    if error:
+        return error
+    response_data, path, elapsed_ms = result
+    return JSONResponse(response_data, headers={
+        "X-Response-Path": path,
+        "Server-Timing": f"intent;dur={elapsed_ms:.2f}",
+    })
+
+
+@instrumented("voice_order_batch")
+async def voice_order_batch(request):
+    payload = await read_json(request)
+    user_inputs = payload.get('inputs')
+    error = api.batch_inputs_error(user_inputs)
+    if error:
+        return JSONResponse({"error": error}, status_code=400)
+
+    result, error = await run_limited("voice-order-batch", api.process_voice_order_batch, user_inputs,
+                                      bool(payload.get('sentiment')))
+    return error or JSONResponse(result)
+
+
+@instrumented("feedback")
+async def feedback(request):
+    payload = await read_json(request)
+    user_feedback = payload.get('feedback')
+    if not user_feedback:
+        return JSONResponse({"error": "No feedback provided"}, status_code=400)
+
+    return JSONResponse({"message": "Thank you for your feedback!"}, status_code=200)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    api.create_tables()
+    # Native routes bypass Flask's before_request hook, so start hot reload here
+    api.knowledge_base.ensure_polling()
+    yield
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+app = Starlette(
+    routes=[
+        Route('/api/voice-order', voice_order, methods=['POST']),
+        Route('/api/voice-order/batch', voice_order_batch, methods=['POST']),
+        Route('/api/feedback', feedback, methods=['POST']),
+        # Preferences, admin and anything else keep running on the Flask app
+        Mount('/', app=WSGIMiddleware(api.app, workers=WSGI_WORKERS)),
+    ],
+    # Same open CORS policy as flask_cors' CORS(app)
+    middleware=[Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])],
+    lifespan=lifespan,
+)
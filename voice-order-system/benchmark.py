@@ -0,0 +1,360 @@
+import argparse
+import csv
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from preprocessing import STOP_WORDS
+
+# Offline latency benchmark for the voice-order request path.
+#
+#   python benchmark.py --output bench.json
+#   python benchmark.py --quick --compare bench.json
+#
+# Each stage (preprocess_text, match_inquiry, determine_intent, analyze_sentiment,
+# log_interaction and POST /api/voice-order through the Flask test client) is timed
+# call by call over synthetic FAQ tables of several sizes built from inquiries.csv
+# and utterance corpora with a controlled share of repeated utterances. The
+# transformer is replaced by a stub unless --real-sentiment is given, and all
+# logs, databases and artifacts go to a temporary directory.
+
+DEFAULT_SIZES = [50, 1000, 10000]
+DEFAULT_REPEAT_RATES = [0.0, 0.5, 0.9]
+
+# Share of a base question's words replaced by synthetic words in each generated FAQ row.
+# The replacements keep most words rare, as in a real large FAQ, so the frequent-word
+# filter doesn't strip the whole table down to nothing.
+SUBSTITUTION_RATE = 0.7
+
+FILLERS = ["", "", "hey", "um", "excuse me", "hello there", "quick question", "sorry to bother you"]
+COMMAND_TEMPLATES = ["{keyword}", "can you {keyword} please", "i would like {keyword}", "please {keyword} now",
+                     "could someone {keyword}"]
+NAME_SYLLABLES = ["ka", "lo", "mi", "ra", "ten", "vo", "shi", "da", "ne", "pu", "ri", "zo"]
+
+NEGATIVE_WORDS = {"not", "bad", "unhappy", "problem", "dirty", "cold", "complaint", "issue", "broken", "noisy"}
+
+
+# Function to read the (question, response) rows of the real FAQ table
+def read_faq(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return [(row['Question'], row['Response']) for row in csv.DictReader(f)]
+
+
+# Function to write a synthetic FAQ table of `size` rows: the base rows, then variants of
+# them with most content words swapped for synthetic ones. Returns the rows.
+def make_faq(base_rows, size, path, rng):
+    vocabulary = ["".join(syllables) for syllables in itertools.product(NAME_SYLLABLES, repeat=4)]
+    rng.shuffle(vocabulary)
+    words = iter(vocabulary * (1 + 4 * size // len(vocabulary)))
+
+    rows = list(base_rows[:size])
+    while len(rows) < size:
+        question, response = base_rows[len(rows) % len(base_rows)]
+        variant = [next(words) if word.isalpha() and word.lower() not in STOP_WORDS and rng.random() < SUBSTITUTION_RATE
+                   else word for word in question.rstrip('?').split()]
+        rows.append((" ".join(variant) + "?", f"{response} (#{len(rows)})"))
+
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+        writer.writerow(["Question", "Response"])
+        writer.writerows(rows)
+    return rows
+
+
+# Function to make a new, unique guest name (letters only, so it survives preprocessing)
+def guest_name(rng):
+    return "".join(rng.choice(NAME_SYLLABLES) for _ in range(4))
+
+
+# Function to build `count` utterances where roughly `repeat_rate` of them repeat an earlier one
+def make_utterances(questions, keywords, count, repeat_rate, rng):
+    utterances = []
+    for _ in range(count):
+        if utterances and rng.random() < repeat_rate:
+            utterances.append(rng.choice(utterances))
+            continue
+        if rng.random() < 0.6:
+            text = rng.choice(questions)
+        else:
+            text = rng.choice(COMMAND_TEMPLATES).format(keyword=rng.choice(keywords))
+        filler = rng.choice(FILLERS)
+        utterances.append(f"{filler} {text} for guest {guest_name(rng)}".strip())
+    return utterances
+
+
+# Deterministic stand-in for the transformer so the benchmark runs offline
+def stub_run_model(texts):
+    return [("NEGATIVE", 0.99) if NEGATIVE_WORDS & set(text.split()) else ("POSITIVE", 0.99) for text in texts]
+
+
+# Function to summarize per-call latencies in milliseconds
+def summarize(latencies, wall_seconds):
+    latencies = np.asarray(latencies) * 1000
+    return {
+        "count": int(len(latencies)),
+        "mean_ms": round(float(latencies.mean()), 4),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 4),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 4),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 4),
+        "max_ms": round(float(latencies.max()), 4),
+        "throughput_per_s": round(len(latencies) / wall_seconds, 2) if wall_seconds else None,
+    }
+
+
+# Function to time fn over every input, then measure its peak traced memory in a second pass.
+# reset() runs before each pass so caches start cold both times.
+def measure(fn, inputs, reset=None, warmup=0, memory=True):
+    for item in inputs[:warmup]:
+        fn(item)
+
+    if reset:
+        reset()
+    latencies = []
+    started = time.perf_counter()
+    for item in inputs:
+        call_started = time.perf_counter()
+        fn(item)
+        latencies.append(time.perf_counter() - call_started)
+    result = summarize(latencies, time.perf_counter() - started)
+
+    if memory:
+        if reset:
+            reset()
+        tracemalloc.start()
+        try:
+            for item in inputs:
+                fn(item)
+            result["peak_memory_kb"] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+class Benchmark:
+    def __init__(self, args, workdir):
+        self.args = args
+        self.workdir = workdir
+        self.results = []
+
+        # Keep every side effect inside the temporary directory
+        import user_log
+        user_log.LOG_FILE = os.path.join(workdir, "interaction_logs.txt")
+        user_log.FEEDBACK_FILE = os.path.join(workdir, "feedback_logs.txt")
+        user_log.logger = user_log.InteractionLogger(db_path=os.path.join(workdir, "interactions.db"))
+
+        import sentiment_analysis
+        if not args.real_sentiment:
+            sentiment_analysis._run_model = stub_run_model
+
+        # Importing api builds its knowledge base artifact; keep it and the user database out of the tree
+        os.environ["INQUIRY_ARTIFACT_PATH"] = os.path.join(workdir, "inquiry_artifact.joblib")
+        os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(workdir, "users.db")
+        import api
+        api.app.config['TESTING'] = True
+        api.response_cache.backend = None
+        self.api = api
+        self.user_log = user_log
+        self.sentiment_analysis = sentiment_analysis
+        self.client = api.app.test_client()
+
+        self.base_rows = read_faq(args.inquiries)
+        with open(args.intents, encoding='utf-8') as f:
+            self.keywords = sorted({keyword for keywords in json.load(f)["keywords"].values() for keyword in keywords})
+        self.corpora = self.make_corpora(self.base_rows, random.Random(args.seed))
+
+    def record(self, stage, measurement_fn, **labels):
+        entry = {"stage": stage, **labels}
+        try:
+            entry.update(measurement_fn())
+        except Exception as e:
+            entry["error"] = f"{type(e).__name__}: {str(e).strip().splitlines()[0] if str(e).strip() else ''}"
+        self.results.append(entry)
+        self.report(entry)
+
+    @staticmethod
+    def report(entry):
+        labels = " ".join(f"{key}={entry[key]}" for key in ("faq_size", "repeat_rate") if key in entry)
+        if "error" in entry:
+            summary = f"ERROR {entry['error']}"
+        elif "build_ms" in entry:
+            summary = f"build={entry['build_ms']:.1f}ms peak={entry['peak_memory_kb']}KB"
+        else:
+            summary = (f"p50={entry['p50_ms']:.3f}ms p95={entry['p95_ms']:.3f}ms p99={entry['p99_ms']:.3f}ms "
+                       f"{entry['throughput_per_s']}/s peak={entry.get('peak_memory_kb', '-')}KB")
+        print(f"{entry['stage']:<20} {labels:<32} {summary}")
+
+    # Utterance corpora (one per repeat rate) asking the questions of the given FAQ rows
+    def make_corpora(self, rows, rng):
+        questions = [question for question, _ in rows]
+        return {rate: make_utterances(questions, self.keywords, self.args.utterances, rate, rng)
+                for rate in self.args.repeat_rates}
+
+    # Swap in a knowledge base built from a synthetic FAQ table, returning its build measurement
+    def load_faq(self, size):
+        from knowledge_base import KnowledgeBase
+
+        csv_path = os.path.join(self.workdir, f"faq_{size}.csv")
+        # Seeded per size, so a table doesn't depend on which other sizes were run
+        self.rng = random.Random(f"{self.args.seed}-{size}")
+        self.faq_rows = make_faq(self.base_rows, size, csv_path, self.rng)
+        artifact_path = os.path.join(self.workdir, f"faq_{size}.joblib")
+        tracemalloc.start()
+        started = time.perf_counter()
+        try:
+            knowledge_base = KnowledgeBase(csv_path, self.args.intents, artifact_path, poll_interval=3600)
+            elapsed = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        self.api.knowledge_base = knowledge_base
+        return {"count": 1, "build_ms": round(elapsed * 1000, 2), "peak_memory_kb": round(peak / 1024, 1)}
+
+    def reset_caches(self):
+        self.api.response_cache.clear()
+        self.sentiment_analysis.sentiment_cache.clear()
+
+    def run(self):
+        memory = not self.args.no_memory
+        utterances = self.corpora[self.args.repeat_rates[0]]
+
+        self.record("preprocess_text", lambda: measure(self.api.preprocess_text, utterances, memory=memory))
+
+        for rate, corpus in self.corpora.items():
+            self.record("analyze_sentiment", lambda: measure(self.sentiment_analysis.analyze_sentiment, corpus,
+                                                             reset=self.reset_caches, memory=memory),
+                        repeat_rate=rate)
+
+        self.record("log_interaction", self.measure_logging)
+
+        for size in self.args.sizes:
+            self.record("knowledge_base", lambda: self.load_faq(size), faq_size=size)
+            corpora = self.make_corpora(self.faq_rows, self.rng)
+            faq_utterances = corpora[self.args.repeat_rates[0]]
+            self.record("match_inquiry", lambda: measure(self.api.match_inquiry, faq_utterances, memory=memory),
+                        faq_size=size)
+            for rate, corpus in corpora.items():
+                self.record("determine_intent", lambda: measure(self.api.determine_intent, corpus,
+                                                                reset=self.reset_caches, memory=memory),
+                            faq_size=size, repeat_rate=rate)
+                self.record("flask_voice_order", lambda: measure(self.post_voice_order, corpus,
+                                                                 reset=self.reset_caches, memory=memory),
+                            faq_size=size, repeat_rate=rate)
+        return self.results
+
+    def post_voice_order(self, text):
+        response = self.client.post('/api/voice-order', json={"input": text})
+        if response.status_code != 200:
+            raise RuntimeError(f"/api/voice-order returned {response.status_code}")
+
+    # Enqueue latency as seen by a request thread, plus how long the writer takes to drain the queue
+    def measure_logging(self):
+        logger = self.user_log.logger
+        utterances = self.corpora[self.args.repeat_rates[0]]
+        written = logger.written
+        started = time.perf_counter()
+        result = measure(lambda text: self.user_log.log_interaction(text, "Inquiry", None, "response", "inquiry", 1.0),
+                         utterances, memory=False)
+        expected = written + len(utterances)
+        while logger.written + logger.dropped < expected and time.perf_counter() - started < 60:
+            time.sleep(0.01)
+        result["drain_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        result["dropped"] = logger.dropped
+        return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def result_key(entry):
+    return entry["stage"], entry.get("faq_size"), entry.get("repeat_rate")
+
+
+# Function to print p95 changes against a previous run; returns True if any stage regressed.
+# Changes smaller than min_delta_ms are timer noise and never count as regressions.
+def compare(results, baseline_path, threshold, min_delta_ms):
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {result_key(entry): entry for entry in json.load(f)["results"]}
+
+    print(f"\nComparison with {baseline_path} (p95, regression threshold x{threshold}):")
+    regressed = False
+    for entry in results:
+        previous = baseline.get(result_key(entry))
+        if not previous or "p95_ms" not in previous or "p95_ms" not in entry:
+            continue
+        ratio = entry["p95_ms"] / previous["p95_ms"] if previous["p95_ms"] else float("inf")
+        flag = "REGRESSION" if ratio > threshold and entry["p95_ms"] - previous["p95_ms"] > min_delta_ms else ""
+        regressed = regressed or bool(flag)
+        stage, size, rate = result_key(entry)
+        print(f"{stage:<20} faq_size={size} repeat_rate={rate}: {previous['p95_ms']:.3f}ms -> "
+              f"{entry['p95_ms']:.3f}ms (x{ratio:.2f}) {flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the voice-order request path offline.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="Synthetic FAQ table sizes")
+    parser.add_argument('--repeat-rates', type=float, nargs='+', default=DEFAULT_REPEAT_RATES,
+                        help="Share of utterances that repeat an earlier one")
+    parser.add_argument('--utterances', type=int, default=500, help="Utterances per corpus")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--quick', action='store_true', help="Small run: FAQ sizes 50 and 1000, 100 utterances")
+    parser.add_argument('--no-memory', action='store_true', help="Skip the tracemalloc pass")
+    parser.add_argument('--real-sentiment', action='store_true', help="Use the transformer instead of the stub")
+    parser.add_argument('--inquiries', default='inquiries.csv', help="Base FAQ table")
+    parser.add_argument('--intents', default='intents.json', help="Intent keyword table")
+    parser.add_argument('--output', help="Write the results as JSON to this file")
+    parser.add_argument('--compare', help="Previous JSON results to compare against")
+    parser.add_argument('--threshold', type=float, default=1.2, help="p95 ratio reported as a regression")
+    parser.add_argument('--min-delta-ms', type=float, default=0.05, help="Smallest p95 increase reported as a regression")
+    args = parser.parse_args()
+    if args.quick:
+        args.sizes, args.utterances = [50, 1000], 100
+
+    # Run next to api.py so its relative data paths resolve
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    args.inquiries, args.intents = os.path.abspath(args.inquiries), os.path.abspath(args.intents)
+
+    with tempfile.TemporaryDirectory(prefix="voice-order-bench-") as workdir:
+        benchmark = Benchmark(args, workdir)
+        results = benchmark.run()
+        benchmark.user_log.logger.close()
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sentiment": "model" if args.real_sentiment else "stub",
+            "sizes": args.sizes,
+            "repeat_rates": args.repeat_rates,
+            "utterances": args.utterances,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.compare and compare(results, args.compare, args.threshold, args.min_delta_ms):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
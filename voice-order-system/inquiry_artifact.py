@@ -0,0 +1,97 @@
+import os
+import sys
+import hashlib
+
+import joblib
+
+from inquiry_index import InquiryIndex
+from preprocessing import preprocess_batch, get_frequent_words
+
+# Bump when the artifact layout changes so stale files are rebuilt
+ARTIFACT_VERSION = 4
+ARTIFACT_PATH = os.getenv("INQUIRY_ARTIFACT_PATH", os.path.join("instance", "inquiry_artifact.joblib"))
+
+
+# Function to compute the SHA-256 checksum of a file
+def file_checksum(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# Function to parse the inquiries CSV, tokenizing every question once.
+# token_cache maps question -> tokens from a previous build so unchanged rows are not re-tokenized.
+def load_inquiries(file_path, token_cache=None):
+    import pandas as pd
+
+    token_cache = token_cache or {}
+    df = pd.read_csv(file_path)
+    questions = df['Question'].str.strip().tolist()
+    responses = df['Response'].tolist()
+
+    # Remove frequent words from the processed questions
+    uncached = [question for question in questions if question not in token_cache]
+    token_cache = {**token_cache, **dict(zip(uncached, preprocess_batch(uncached)))}
+    tokenized = [token_cache[question] for question in questions]
+    frequent_words = get_frequent_words(tokenized)
+    processed = [' '.join([word for word in words if word not in frequent_words]) for words in tokenized]
+    return questions, tokenized, processed, responses, frequent_words
+
+
+# Function to build the artifact: processed inquiry table, frequent words and match index
+def build_artifact(csv_path, artifact_path=ARTIFACT_PATH, token_cache=None):
+    checksum = file_checksum(csv_path)
+    questions, tokenized, processed, responses, frequent_words = load_inquiries(csv_path, token_cache)
+
+    # Later duplicates of a processed question win, as with the original dict
+    inquiries = dict(zip(processed, responses))
+    artifact = {
+        "version": ARTIFACT_VERSION,
+        "checksum": checksum,
+        "questions": questions,
+        "tokenized": tokenized,
+        "processed": processed,
+        "responses": responses,
+        "frequent_words": frozenset(frequent_words),
+        "index": InquiryIndex(inquiries.keys(), inquiries.values()),
+    }
+
+    # Write to a temporary file first so workers never load a partial artifact
+    os.makedirs(os.path.dirname(artifact_path) or ".", exist_ok=True)
+    temp_path = f"{artifact_path}.{os.getpid()}.tmp"
+    joblib.dump(artifact, temp_path)
+    os.replace(temp_path, artifact_path)
+    return artifact
+
+
+# Function to load the artifact memory-mapped, rebuilding it only when the CSV checksum changed
+def load_artifact(csv_path, artifact_path=ARTIFACT_PATH):
+    try:
+        checksum = file_checksum(csv_path)
+        if os.path.exists(artifact_path):
+            artifact = joblib.load(artifact_path, mmap_mode='r')
+            if artifact.get("version") == ARTIFACT_VERSION and artifact.get("checksum") == checksum:
+                return artifact
+        return build_artifact(csv_path, artifact_path)
+    except Exception as e:
+        print(f"Error loading inquiries: {e}")
+        return {
+            "version": ARTIFACT_VERSION,
+            "checksum": None,
+            "questions": [],
+            "tokenized": [],
+            "processed": [],
+            "responses": [],
+            "frequent_words": frozenset(),
+            "index": InquiryIndex([], []),
+        }
+
+
+if __name__ == "__main__":
+    # Build step: python inquiry_artifact.py [inquiries.csv] [artifact path]
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else 'inquiries.csv'
+    artifact_path = sys.argv[2] if len(sys.argv) > 2 else ARTIFACT_PATH
+    artifact = build_artifact(csv_path, artifact_path)
+    print(f"Built {artifact_path}: {len(artifact['index'])} inquiries, {len(artifact['frequent_words'])} frequent words")
@@ -0,0 +1,78 @@
+import os
+import json
+import threading
+
+import numpy as np
+
+MODEL_PATH = os.path.join("models", "inquiry_intent_model.joblib")
+VECTORIZER_PATH = os.path.join("models", "inquiry_vectorizer.joblib")
+# Written by inquiry_training.py next to the artifacts: what the model can reach on the FAQ
+METADATA_PATH = os.path.join("models", "inquiry_classifier.json")
+
+# Minimum predicted probability for the classifier's answer to skip the fuzzy match
+CONFIDENCE_THRESHOLD = float(os.getenv("INQUIRY_CLASSIFIER_THRESHOLD", "0.6"))
+
+# Set INQUIRY_CLASSIFIER_ENABLED=0 to always use the fuzzy match
+ENABLED = os.getenv("INQUIRY_CLASSIFIER_ENABLED", "1") == "1"
+
+
+# First-stage inquiry classifier backed by the joblib artifacts from inquiry_training.py.
+# The training script records the best confidence the model reaches on the FAQ
+# questions; if that is below the threshold no input can clear it either, so the
+# classifier stays disabled without importing sklearn. Otherwise the artifacts are
+# loaded once, memory-mapped, at startup. Missing or unloadable artifacts disable it too.
+class InquiryClassifier:
+    def __init__(self, model_path=MODEL_PATH, vectorizer_path=VECTORIZER_PATH, metadata_path=METADATA_PATH,
+                 threshold=CONFIDENCE_THRESHOLD, enabled=ENABLED):
+        self.model_path = model_path
+        self.vectorizer_path = vectorizer_path
+        self.metadata_path = metadata_path
+        self.threshold = threshold
+        self.enabled = enabled
+        self.model = None
+        self.vectorizer = None
+        self.loaded = False
+        self.lock = threading.Lock()
+
+    # Cheap check, from the training metadata, that the classifier could answer anything
+    def available(self):
+        if not self.enabled or not os.path.exists(self.model_path) or not os.path.exists(self.vectorizer_path):
+            return False
+        try:
+            with open(self.metadata_path, encoding="utf-8") as f:
+                best_confidence = json.load(f)["best_confidence"]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Inquiry classifier disabled: no training metadata ({e}); retrain with models/inquiry_training.py.")
+            return False
+        if best_confidence < self.threshold:
+            print(f"Inquiry classifier disabled: its best confidence on the FAQ questions "
+                  f"({best_confidence:.3f}) is below the threshold ({self.threshold}).")
+            return False
+        return True
+
+    def load(self):
+        if self.loaded:
+            return self.model is not None
+        with self.lock:
+            if not self.loaded:
+                if self.available():
+                    try:
+                        import joblib
+                        self.model = joblib.load(self.model_path, mmap_mode='r')
+                        self.vectorizer = joblib.load(self.vectorizer_path, mmap_mode='r')
+                    except Exception as e:
+                        print(f"Error loading inquiry classifier: {e}")
+                        self.model = self.vectorizer = None
+                self.loaded = True
+        return self.model is not None
+
+    # Return a (response, confidence) tuple per text; response is None below the threshold
+    def predict_batch(self, texts):
+        if not texts or not self.load():
+            return [(None, 0.0)] * len(texts)
+
+        probabilities = self.model.predict_proba(self.vectorizer.transform(texts))
+        best = probabilities.argmax(axis=1)
+        confidence = probabilities[np.arange(len(texts)), best]
+        return [(self.model.classes_[label] if score >= self.threshold else None, float(score))
+                for label, score in zip(best, confidence)]
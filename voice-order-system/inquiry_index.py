@@ -0,0 +1,160 @@
+import math
+from collections import Counter
+
+import numpy as np
+
+# Minimum fuzzy score (0-100) for an inquiry to count as a match
+INQUIRY_MATCH_THRESHOLD = 75
+
+# Number of candidates re-scored with the fuzzy scorer after the vectorized pass
+SHORTLIST_SIZE = 10
+
+# Character n-gram sizes used for the TF-IDF ranking
+NGRAM_RANGE = (2, 4)
+
+# Queries ranked per accumulation, bounding the dense similarity block
+QUERY_CHUNK_SIZE = 256
+
+
+# Function to yield the character n-grams of each word, padded with spaces
+def char_ngrams(text, ngram_range=NGRAM_RANGE):
+    for word in text.split():
+        word = ' ' + word + ' '
+        for n in range(ngram_range[0], ngram_range[1] + 1):
+            for start in range(max(len(word) - n + 1, 1)):
+                yield word[start:start + n]
+
+
+# Inquiry matching engine built once from the processed questions.
+# A token inverted index narrows the rows to score, a char n-gram TF-IDF matrix
+# stored column-wise ranks those rows in one vectorized NumPy pass, and only the
+# short list is re-scored with token_set_ratio so the 0-100 threshold keeps its
+# meaning. Everything is plain lists and NumPy arrays, so the index can be
+# pickled into the inquiry artifact and memory-mapped back without sklearn.
+class InquiryIndex:
+    def __init__(self, questions, responses, shortlist_size=SHORTLIST_SIZE):
+        self.questions = list(questions)
+        self.responses = list(responses)
+        self.shortlist_size = shortlist_size
+
+        # Token -> row ids containing that token, stored CSR-style so a memory-mapped
+        # artifact maps two large arrays instead of one small array per token:
+        # token_slots[token] = slot, rows posting_rows[posting_ptr[slot]:posting_ptr[slot + 1]]
+        postings = {}
+        for row, question in enumerate(self.questions):
+            for token in set(question.split()):
+                postings.setdefault(token, []).append(row)
+        self.token_slots = {token: slot for slot, token in enumerate(postings)}
+        self.posting_rows = np.array([row for rows in postings.values() for row in rows], dtype=np.int32)
+        self.posting_ptr = np.concatenate([[0], np.cumsum([len(rows) for rows in postings.values()])]).astype(np.int64)
+        self.all_rows = np.arange(len(self.questions), dtype=np.int32)
+
+        self._build_tfidf()
+
+    def _build_tfidf(self):
+        counts = [Counter(char_ngrams(question)) for question in self.questions]
+        document_frequency = Counter()
+        for row_counts in counts:
+            document_frequency.update(row_counts.keys())
+
+        # Smoothed idf, as in sklearn's TfidfVectorizer
+        ngrams = sorted(document_frequency)
+        self.vocabulary = {ngram: column for column, ngram in enumerate(ngrams)}
+        total = len(self.questions)
+        self.idf = np.array([math.log((1 + total) / (1 + document_frequency[ngram])) + 1 for ngram in ngrams],
+                            dtype=np.float32)
+
+        rows, columns, values = [], [], []
+        for row, row_counts in enumerate(counts):
+            if not row_counts:
+                continue
+            row_columns = [self.vocabulary[ngram] for ngram in row_counts]
+            weights = np.array([1 + math.log(count) for count in row_counts.values()], dtype=np.float32) * self.idf[row_columns]
+            weights /= np.linalg.norm(weights)
+            rows.extend([row] * len(row_columns))
+            columns.extend(row_columns)
+            values.extend(weights.tolist())
+
+        # Column-major arrays: column c holds rows col_rows[col_ptr[c]:col_ptr[c + 1]]
+        columns = np.array(columns, dtype=np.int32)
+        order = np.argsort(columns, kind='stable')
+        self.col_rows = np.array(rows, dtype=np.int32)[order]
+        self.col_data = np.array(values, dtype=np.float32)[order]
+        self.col_ptr = np.concatenate([[0], np.cumsum(np.bincount(columns, minlength=len(ngrams)))]).astype(np.int64)
+
+    def __len__(self):
+        return len(self.questions)
+
+    # Rows sharing at least one token with the query, or every row when none do
+    # (so misspelled queries can still be caught by the char n-grams)
+    def candidates(self, tokens):
+        slots = [self.token_slots[token] for token in set(tokens) if token in self.token_slots]
+        hits = [self.posting_rows[self.posting_ptr[slot]:self.posting_ptr[slot + 1]] for slot in slots]
+        if not hits:
+            return self.all_rows
+        return np.unique(np.concatenate(hits))
+
+    # Cosine similarity of each query against every row, as a (queries x rows) block.
+    # The column arrays are the CSR layout of the n-gram x row matrix, so scipy wraps
+    # them without copying and one sparse product scores the whole block of queries.
+    def similarity_batch(self, queries):
+        from scipy.sparse import csr_matrix
+
+        query_ptr, columns, weights = [0], [], []
+        for query in queries:
+            query_counts = Counter(ngram for ngram in char_ngrams(query) if ngram in self.vocabulary)
+            columns.extend(self.vocabulary[ngram] for ngram in query_counts)
+            weights.extend(1 + math.log(count) for count in query_counts.values())
+            query_ptr.append(len(columns))
+
+        columns = np.array(columns, dtype=np.int64)
+        weights = np.array(weights, dtype=np.float32) * self.idf[columns]
+        query_matrix = csr_matrix((weights, columns, query_ptr), shape=(len(queries), len(self.vocabulary)))
+        ngram_matrix = csr_matrix((self.col_data, self.col_rows, self.col_ptr),
+                                  shape=(len(self.vocabulary), len(self.questions)), copy=False)
+        return (query_matrix @ ngram_matrix).toarray()
+
+    # Cosine similarity of the query against every row
+    def similarity(self, query):
+        return self.similarity_batch([query])[0]
+
+    # Return up to k (question, response, score) tuples, best first
+    def search(self, query, k=1):
+        return self.search_batch([query], k=k)[0]
+
+    # Search many queries: the queries of each chunk that need ranking are scored against
+    # every row in one sparse product, then each query's short list is re-scored
+    def search_batch(self, queries, k=1):
+        results = [[] for _ in queries]
+        if not self.questions:
+            return results
+
+        active = [i for i, query in enumerate(queries) if query]
+        for start in range(0, len(active), QUERY_CHUNK_SIZE):
+            chunk = active[start:start + QUERY_CHUNK_SIZE]
+            candidates = {i: self.candidates(queries[i].split()) for i in chunk}
+            ranked = [i for i in chunk if len(candidates[i]) > self.shortlist_size]
+            if ranked:
+                similarity = self.similarity_batch([queries[i] for i in ranked])
+                for position, i in enumerate(ranked):
+                    rows = candidates[i]
+                    top = np.argpartition(-similarity[position, rows], self.shortlist_size - 1)[:self.shortlist_size]
+                    candidates[i] = np.sort(rows[top])
+            for i in chunk:
+                results[i] = self._rescore(queries[i], candidates[i], k)
+        return results
+
+    def _rescore(self, query, rows, k):
+        from fuzzywuzzy import fuzz
+
+        scored = [(int(row), fuzz.token_set_ratio(query, self.questions[row])) for row in rows]
+        # Highest score first; ties keep CSV order like process.extractOne did
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return [(self.questions[row], self.responses[row], score) for row, score in scored[:k]]
+
+    # Best response if it clears the threshold, else None
+    def match(self, query, threshold=INQUIRY_MATCH_THRESHOLD):
+        results = self.search(query, k=1)
+        if results and results[0][2] >= threshold:
+            return results[0][1]
+        return None
@@ -1,34 +1,86 @@
 import re
 
-def recognize_intent(text):
+INTENT_PATTERNS = {
+    "Room Service Order": ["order", "bring", "get", "want", "have", "could i have", "i'd like", "please bring", "ice cream", "pizza", "sandwich", "burger", "food", "dinner", "meal"],
+    "Amenities Request": ["need", "request", "extra", "more", "get me", "can i have", "could you provide", "send me", "bring me", "add"],
+    "Inquiry": ["time", "when", "where", "how", "what", "tell me about", "information", "details"],
+    "Feedback or Complaint": ["not happy", "complaint", "problem", "issue", "unsatisfied", "unhappy", "bad experience", "dissatisfied", "concern"],
+    "Reservation Request": ["book", "reserve", "reservation", "table", "booking", "reserve a spot", "make a reservation", "sign up", "schedule"],
+    "Check-In/Check-Out Request": ["check-in", "check out", "early check-out", "late check-in", "early check", "late checkout", "arrival", "departure"],
+}
+
+NEGATION = "Negation"
+NEGATION_PATTERNS = ["no", "not", "don't", "do not", "never", "can't", "cannot", "won't", "will not"]
+
+# Intents that are reported as "Do not ..." when the text contains a negation
+NEGATABLE_INTENTS = ["Room Service Order", "Amenities Request", "Reservation Request"]
+
+
+# Regex intent recognizer. Every phrase of every intent (plus the negations) is
+# compiled once into a single alternation with one named group per phrase, so a
+# single scan of the text yields all matching intents and the negation flag.
+class IntentRecognizer:
+    def __init__(self, intent_patterns=INTENT_PATTERNS, negation_patterns=NEGATION_PATTERNS):
+        self.intents = list(intent_patterns)
+        labelled = dict(intent_patterns)
+        labelled[NEGATION] = negation_patterns
+
+        phrases = sorted({phrase.lower() for patterns in labelled.values() for phrase in patterns}, key=len, reverse=True)
+
+        # A matched phrase counts for every label with a phrase inside it
+        # ("not happy" is both a complaint and a negation), since the scan
+        # reports only the longest phrase starting at each position
+        label_patterns = {label: re.compile(r"\b(?:" + "|".join(re.escape(p.lower()) for p in patterns) + r")\b")
+                          for label, patterns in labelled.items()}
+        self.phrase_labels = [frozenset(label for label, pattern in label_patterns.items() if pattern.search(phrase))
+                              for phrase in phrases]
+
+        # Zero-width lookahead so phrases that overlap ("do not" / "not happy") are all found
+        self.pattern = re.compile(r"(?=\b(?:" + "|".join(f"(?P<p{i}>{re.escape(phrase)})" for i, phrase in enumerate(phrases)) + r")\b)")
 
-    text = text.lower().strip()
-
-    intent_patterns = {
-        "Room Service Order": r"\b(?:order|bring|get|want|have|could I have|I'd like|please bring|ice cream|pizza|sandwich|burger|food|dinner|meal)\b",
-        "Amenities Request": r"\b(?:need|request|extra|more|get me|can I have|could you provide|send me|bring me|add)\b",
-        "Inquiry": r"\b(?:time|when|where|how|what|tell me about|information|details)\b",
-        "Feedback or Complaint": r"\b(?:not happy|complaint|problem|issue|unsatisfied|unhappy|bad experience|dissatisfied|issue|concern)\b",
-        "Reservation Request": r"\b(?:book|reserve|reservation|table|booking|reserve a spot|make a reservation|sign up|schedule)\b",
-        "Check-In/Check-Out Request": r"\b(?:check-in|check out|early check-out|late check-in|early check|late checkout|arrival|departure)\b",
-        "Negation": r"\b(?:no|not|don't|do not|never|can't|cannot|won't|will not)\b"
-    }
-
-    # Check for negations
-    negation_found = re.search(intent_patterns["Negation"], text)
-    
-    # Iterate through patterns to find a match
-    for intent, pattern in intent_patterns.items():
-        if intent != "Negation" and re.search(pattern, text):
-
-            if negation_found:
-                if intent in ["Room Service Order", "Amenities Request", "Reservation Request"]:
+    # Return (matched intents, negation found) for one scan of the text
+    def scan(self, text):
+        labels = set()
+        for match in self.pattern.finditer(text.lower()):
+            labels.update(self.phrase_labels[int(match.lastgroup[1:])])
+        negation_found = NEGATION in labels
+        labels.discard(NEGATION)
+        return labels, negation_found
+
+    def recognize(self, text):
+        labels, negation_found = self.scan(text.strip())
+
+        # Report the first matching intent in declaration order
+        for intent in self.intents:
+            if intent in labels:
+                if negation_found and intent in NEGATABLE_INTENTS:
                     return f"Do not {intent.lower()}"
-            return intent
+                return intent
+
+        # If no patterns match, return Unknown Intent
+        return "Unknown Intent"
+
+    # Classify many texts with the same compiled pattern
+    def recognize_many(self, texts):
+        return [self.recognize(text) for text in texts]
+
+
+recognizer = IntentRecognizer()
+
+def recognize_intent(text):
+    return recognizer.recognize(text)
 
-    # If no patterns match, return Unknown Intent
-    return "Unknown Intent"
+def recognize_many(texts):
+    return recognizer.recognize_many(texts)
 
-for query in test_queries:
-    intent = recognize_intent(query)
-    print(f"Query: '{query}' -> Recognized Intent: '{intent}'")
+if __name__ == "__main__":
+    test_queries = [
+        "Can I get a pizza?",
+        "I don't want dinner",
+        "What time is check-in?",
+        "I'm not happy with the room",
+        "Please reserve a table for two",
+    ]
+    for query in test_queries:
+        intent = recognize_intent(query)
+        print(f"Query: '{query}' -> Recognized Intent: '{intent}'")
@@ -0,0 +1,85 @@
+from collections import deque
+
+
+# Characters that count as part of a word when checking keyword boundaries
+def is_word_char(char):
+    return char.isalnum() or char == '_'
+
+
+# Function to check that a keyword ending before `end` is followed by a word boundary,
+# optionally after a plural "s" or "es" ("towel" matches "towels", "meal" matches "meals")
+def ends_word(text, end):
+    for suffix in ("", "s", "es"):
+        if text.startswith(suffix, end):
+            after = end + len(suffix)
+            if after == len(text) or not is_word_char(text[after]):
+                return True
+    return False
+
+
+# Aho-Corasick automaton over every intent keyword.
+# One pass over the text reports every intent whose keyword appears as a whole
+# word or phrase (or its plural), so "hi" no longer fires inside "this" and the
+# cost per utterance does not grow with the number of intents or keywords.
+class KeywordMatcher:
+    def __init__(self, intent_keywords):
+        self.intents = list(intent_keywords)
+
+        # Node 0 is the root; each node has goto edges, a fail link and outputs
+        self.goto = [{}]
+        self.fail = [0]
+        # Outputs are (keyword length, intent index) pairs
+        self.outputs = [[]]
+
+        for intent_id, intent in enumerate(self.intents):
+            for keyword in intent_keywords[intent]:
+                self._add(keyword.lower(), intent_id)
+        self._build_fail_links()
+
+    def _add(self, keyword, intent_id):
+        node = 0
+        for char in keyword:
+            next_node = self.goto[node].get(char)
+            if next_node is None:
+                next_node = len(self.goto)
+                self.goto[node][char] = next_node
+                self.goto.append({})
+                self.fail.append(0)
+                self.outputs.append([])
+            node = next_node
+        if (len(keyword), intent_id) not in self.outputs[node]:
+            self.outputs[node].append((len(keyword), intent_id))
+
+    def _build_fail_links(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                self.outputs[child].extend(self.outputs[self.fail[child]])
+
+    # Return the set of intents with at least one whole-word keyword hit
+    def find_intents(self, text):
+        text = text.lower()
+        goto, fail, outputs = self.goto, self.fail, self.outputs
+        found = set()
+        node = 0
+
+        for end, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if not outputs[node]:
+                continue
+            if not ends_word(text, end + 1):
+                continue
+            for length, intent_id in outputs[node]:
+                start = end - length + 1
+                if start == 0 or not is_word_char(text[start - 1]):
+                    found.add(self.intents[intent_id])
+        return found
+
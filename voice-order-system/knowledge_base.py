@@ -0,0 +1,142 @@
+import os
+import json
+import time
+import datetime
+import threading
+
+from inquiry_artifact import ARTIFACT_PATH, file_checksum, load_artifact, build_artifact
+from keyword_matcher import KeywordMatcher
+
+INQUIRIES_PATH = 'inquiries.csv'
+INTENTS_PATH = 'intents.json'
+
+# Seconds between mtime checks; 0 disables hot reload
+POLL_INTERVAL = float(os.getenv("KB_POLL_INTERVAL", "5"))
+
+# Greeting, yes/no and feedback take precedence over the remaining intents
+PRIORITY_INTENTS = ["Greeting", "Yes/No Response", "Feedback or Complaint"]
+
+
+# Function to load the intent keyword and response tables
+def load_intents(file_path):
+    with open(file_path, encoding="utf-8") as f:
+        tables = json.load(f)
+    return tables["keywords"], tables["responses"]
+
+
+# Everything a request needs to route an utterance, built together and never mutated
+class KnowledgeSnapshot:
+    def __init__(self, version, inquiry_artifact, intent_keywords, intent_responses, intents_checksum, build_seconds,
+                 intent_matcher=None):
+        self.version = version
+        self.built_at = datetime.datetime.now().isoformat(timespec="seconds")
+        self.build_seconds = build_seconds
+
+        self.inquiries_checksum = inquiry_artifact["checksum"]
+        self.frequent_words = inquiry_artifact["frequent_words"]
+        self.inquiry_index = inquiry_artifact["index"]
+        # Question -> tokens, reused so the next rebuild only tokenizes changed rows
+        self.token_cache = dict(zip(inquiry_artifact["questions"], inquiry_artifact["tokenized"]))
+
+        self.intents_checksum = intents_checksum
+        self.intent_keywords = intent_keywords
+        self.intent_responses = intent_responses
+        self.intent_priority = PRIORITY_INTENTS + [intent for intent in intent_keywords if intent not in PRIORITY_INTENTS]
+        self.intent_matcher = intent_matcher or KeywordMatcher(intent_keywords)
+
+        # Identifies the content (not the process-local version) for caches shared across workers
+        self.cache_token = f"{self.inquiries_checksum}:{self.intents_checksum}"
+
+    def describe(self):
+        return {
+            "version": self.version,
+            "built_at": self.built_at,
+            "build_seconds": round(self.build_seconds, 4),
+            "inquiries": len(self.inquiry_index),
+            "inquiries_checksum": self.inquiries_checksum,
+            "intents": len(self.intent_keywords),
+            "intents_checksum": self.intents_checksum,
+        }
+
+
+# Versioned knowledge base. A background thread polls the source files' mtimes,
+# rebuilds changed parts off the request path and swaps the new snapshot in with
+# a single assignment, so a request that read `current` keeps a consistent view.
+class KnowledgeBase:
+    def __init__(self, inquiries_path=INQUIRIES_PATH, intents_path=INTENTS_PATH, artifact_path=ARTIFACT_PATH,
+                 poll_interval=POLL_INTERVAL):
+        self.inquiries_path = inquiries_path
+        self.intents_path = intents_path
+        self.artifact_path = artifact_path
+        self.poll_interval = poll_interval
+        self.reload_lock = threading.Lock()
+        self.poll_thread = None
+        self.poll_pid = None
+
+        started = time.perf_counter()
+        self.mtimes = self._mtimes()
+        intent_keywords, intent_responses = load_intents(intents_path)
+        self.current = KnowledgeSnapshot(1, load_artifact(inquiries_path, artifact_path), intent_keywords,
+                                         intent_responses, file_checksum(intents_path), time.perf_counter() - started)
+
+    def _mtimes(self):
+        return tuple(os.path.getmtime(path) if os.path.exists(path) else None
+                     for path in (self.inquiries_path, self.intents_path))
+
+    # Rebuild whatever changed since the current snapshot; returns True if a new version was swapped in
+    def reload(self, force=False):
+        with self.reload_lock:
+            previous = self.current
+            started = time.perf_counter()
+            try:
+                inquiries_checksum = file_checksum(self.inquiries_path)
+                intents_checksum = file_checksum(self.intents_path)
+                if not force and inquiries_checksum == previous.inquiries_checksum and intents_checksum == previous.intents_checksum:
+                    return False
+
+                if force or inquiries_checksum != previous.inquiries_checksum:
+                    inquiry_artifact = build_artifact(self.inquiries_path, self.artifact_path, previous.token_cache)
+                else:
+                    inquiry_artifact = {
+                        "checksum": previous.inquiries_checksum,
+                        "frequent_words": previous.frequent_words,
+                        "index": previous.inquiry_index,
+                        "questions": list(previous.token_cache),
+                        "tokenized": list(previous.token_cache.values()),
+                    }
+
+                intent_matcher = None
+                if force or intents_checksum != previous.intents_checksum:
+                    intent_keywords, intent_responses = load_intents(self.intents_path)
+                else:
+                    intent_keywords, intent_responses = previous.intent_keywords, previous.intent_responses
+                    intent_matcher = previous.intent_matcher
+
+                snapshot = KnowledgeSnapshot(previous.version + 1, inquiry_artifact, intent_keywords, intent_responses,
+                                             intents_checksum, time.perf_counter() - started, intent_matcher)
+            except Exception as e:
+                # Keep serving the previous version if the edited files don't load
+                print(f"Error reloading knowledge base: {e}")
+                return False
+
+            self.current = snapshot
+            return True
+
+    # Start the polling thread once per process (threads don't survive a fork)
+    def ensure_polling(self):
+        if self.poll_interval <= 0 or self.poll_pid == os.getpid():
+            return
+        with self.reload_lock:
+            if self.poll_pid == os.getpid():
+                return
+            self.poll_pid = os.getpid()
+            self.poll_thread = threading.Thread(target=self._poll, name="knowledge-base-poller", daemon=True)
+            self.poll_thread.start()
+
+    def _poll(self):
+        while True:
+            time.sleep(self.poll_interval)
+            mtimes = self._mtimes()
+            if mtimes != self.mtimes:
+                self.mtimes = mtimes
+                self.reload()
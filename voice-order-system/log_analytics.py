@@ -0,0 +1,335 @@
+import os
+import re
+import sys
+import json
+import sqlite3
+import hashlib
+import argparse
+import datetime
+
+from user_log import LOG_FILE, FEEDBACK_FILE
+
+# Indexed copy of the text logs for dashboards and ad-hoc questions:
+#
+#   python log_analytics.py ingest
+#   python log_analytics.py intents --since 7d --bucket hour
+#   python log_analytics.py utterances --intent "Unknown Intent" --sentiment negative
+#
+# Ingestion streams each log from the byte offset reached by the previous run, so
+# re-running it only reads lines appended since then.
+
+ANALYTICS_DB = os.path.join("instance", "log_analytics.db")
+
+# Lines are committed together with the new offset every this many lines
+INGEST_BATCH_SIZE = 10000
+
+# Bytes hashed at the start of a log to notice that it was rotated or replaced
+HEAD_BYTES = 256
+
+INTERACTION_PATTERN = re.compile(
+    r"^\[(?P<timestamp>[^\]]+)\] Transcription: '(?P<query>.*)' \| Intent: (?P<intent>.*?) \| "
+    r"Sentiment: (?P<sentiment>.*?) \| Response: (?P<response>.*?)"
+    r"(?: \| Path: (?P<path>\S+) \| Elapsed: (?P<elapsed_ms>[\d.]+)ms)?$", re.DOTALL)
+FEEDBACK_PATTERN = re.compile(r"^\[(?P<timestamp>[^\]]+)\] Feedback: '(?P<feedback>.*)'$", re.DOTALL)
+
+# Start of a log record; transcripts containing newlines continue on the following lines
+RECORD_START = re.compile(r"^\[\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\] ")
+MAX_RECORD_LINES = 20
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS interaction (
+        id INTEGER PRIMARY KEY,
+        timestamp TEXT NOT NULL,
+        "query" TEXT,
+        intent TEXT COLLATE NOCASE,
+        sentiment TEXT COLLATE NOCASE,
+        response TEXT,
+        path TEXT,
+        elapsed_ms REAL
+    )""",
+    "CREATE INDEX IF NOT EXISTS interaction_timestamp ON interaction (timestamp)",
+    "CREATE INDEX IF NOT EXISTS interaction_intent ON interaction (intent, timestamp)",
+    "CREATE INDEX IF NOT EXISTS interaction_sentiment ON interaction (sentiment, intent, timestamp)",
+    """CREATE TABLE IF NOT EXISTS feedback (
+        id INTEGER PRIMARY KEY,
+        timestamp TEXT NOT NULL,
+        feedback TEXT
+    )""",
+    "CREATE INDEX IF NOT EXISTS feedback_timestamp ON feedback (timestamp)",
+    """CREATE TABLE IF NOT EXISTS ingest_state (
+        source TEXT PRIMARY KEY,
+        "offset" INTEGER NOT NULL,
+        head TEXT
+    )""",
+]
+
+BUCKETS = {"minute": 16, "hour": 13, "day": 10, "month": 7}
+
+
+# Function to turn a parsed interaction line into a row
+def interaction_row(match):
+    sentiment = match["sentiment"]
+    elapsed_ms = match["elapsed_ms"]
+    return (match["timestamp"], match["query"], match["intent"], None if sentiment == "None" else sentiment,
+            match["response"], match["path"], float(elapsed_ms) if elapsed_ms else None)
+
+
+def feedback_row(match):
+    return match["timestamp"], match["feedback"]
+
+
+# Log sources: (text log, line pattern, row builder, insert statement)
+SOURCES = {
+    "interaction": (INTERACTION_PATTERN, interaction_row,
+                    'INSERT INTO interaction (timestamp, "query", intent, sentiment, response, path, elapsed_ms) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)'),
+    "feedback": (FEEDBACK_PATTERN, feedback_row, "INSERT INTO feedback (timestamp, feedback) VALUES (?, ?)"),
+}
+
+
+# Function to hash the first `length` bytes of a file
+def head_hash(path, length):
+    with open(path, "rb") as log_file:
+        return hashlib.sha256(log_file.read(length)).hexdigest()
+
+
+# Generator over the complete records of a log opened in binary mode at `offset`, yielding
+# (match, safe offset) for each record and (None, safe offset) for each unparseable one.
+# The safe offset is where a later read should resume: a record whose transcript spans
+# lines is held until it parses, so nothing is yielded for its lines until then.
+# A trailing partially written line is left unread.
+def iter_log_records(log_file, pattern, offset=0):
+    pending, pending_lines = None, 0
+    for line in log_file:
+        if not line.endswith(b"\n"):
+            break
+        line_start = offset
+        offset += len(line)
+        text = line.decode("utf-8", errors="replace").rstrip("\r\n")
+
+        if pending is not None and not RECORD_START.match(text) and pending_lines < MAX_RECORD_LINES:
+            pending, pending_lines = f"{pending}\n{text}", pending_lines + 1
+        else:
+            if pending is not None:
+                yield None, line_start
+            pending, pending_lines = text, 1
+
+        match = pattern.match(pending)
+        if match:
+            pending = None
+            yield match, offset
+        elif not RECORD_START.match(pending):
+            pending = None
+            yield None, offset
+
+
+# Function to read every parsed record of a text log ("interaction" or "feedback")
+def read_log(path, kind="interaction"):
+    pattern = SOURCES[kind][0]
+    with open(path, "rb") as log_file:
+        for match, _ in iter_log_records(log_file, pattern):
+            if match is not None:
+                yield match
+
+
+# Function to parse "7d", "24h", "30m" (relative to now) or an ISO date/time into a log timestamp
+def parse_time(value, now=None):
+    if value is None:
+        return None
+    relative = re.fullmatch(r"(\d+)([dhm])", value.strip())
+    if relative:
+        amount, unit = int(relative[1]), relative[2]
+        delta = {"d": datetime.timedelta(days=amount), "h": datetime.timedelta(hours=amount),
+                 "m": datetime.timedelta(minutes=amount)}[unit]
+        return f"{(now or datetime.datetime.now()) - delta:%Y-%m-%d %H:%M:%S}"
+    return f"{datetime.datetime.fromisoformat(value.strip()):%Y-%m-%d %H:%M:%S}"
+
+
+# Query API over the ingested logs
+class LogStore:
+    def __init__(self, db_path=ANALYTICS_DB):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(db_path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        for statement in SCHEMA:
+            self.connection.execute(statement)
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+    # Ingest lines appended to a text log since the last run; returns (lines ingested, lines skipped)
+    def ingest(self, kind, path):
+        pattern, make_row, insert = SOURCES[kind]
+        if not os.path.exists(path):
+            return 0, 0
+
+        state = self.connection.execute('SELECT "offset", head FROM ingest_state WHERE source = ?',
+                                        (os.path.abspath(path),)).fetchone()
+        offset = state["offset"] if state else 0
+        # Start over if the log was truncated, rotated or replaced: the bytes read so far
+        # (up to HEAD_BYTES of them) must still be the same
+        if state and (os.path.getsize(path) < offset or head_hash(path, min(offset, HEAD_BYTES)) != state["head"]):
+            offset = 0
+
+        with open(path, "rb") as log_file:
+            log_file.seek(offset)
+            ingested = skipped = 0
+            rows = []
+            for match, safe_offset in iter_log_records(log_file, pattern, offset):
+                if match is None:
+                    skipped += 1
+                else:
+                    rows.append(make_row(match))
+                if len(rows) >= INGEST_BATCH_SIZE:
+                    ingested += self._commit(insert, rows, path, safe_offset)
+                    rows = []
+                offset = safe_offset
+            ingested += self._commit(insert, rows, path, offset)
+        return ingested, skipped
+
+    def _commit(self, insert, rows, path, offset):
+        head = head_hash(path, min(offset, HEAD_BYTES))
+        with self.connection:
+            self.connection.executemany(insert, rows)
+            self.connection.execute('INSERT OR REPLACE INTO ingest_state (source, "offset", head) VALUES (?, ?, ?)',
+                                    (os.path.abspath(path), offset, head))
+        return len(rows)
+
+    # Function to ingest both default text logs, returning {kind: (ingested, skipped)}
+    def ingest_logs(self, interaction_log=LOG_FILE, feedback_log=FEEDBACK_FILE):
+        return {"interaction": self.ingest("interaction", interaction_log),
+                "feedback": self.ingest("feedback", feedback_log)}
+
+    @staticmethod
+    def _time_filter(since, until, clauses, params):
+        if since:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until:
+            clauses.append("timestamp < ?")
+            params.append(until)
+
+    @staticmethod
+    def _where(clauses):
+        return f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+    # Interaction counts per time bucket and intent
+    def intent_mix(self, since=None, until=None, bucket="hour"):
+        clauses, params = [], []
+        self._time_filter(since, until, clauses, params)
+        return [dict(row) for row in self.connection.execute(
+            f"SELECT substr(timestamp, 1, {BUCKETS[bucket]}) AS bucket, intent, COUNT(*) AS count "
+            f"FROM interaction {self._where(clauses)} GROUP BY bucket, intent ORDER BY bucket, count DESC", params)]
+
+    # Interactions matching the given intent and/or sentiment (case-insensitive), newest first
+    def utterances(self, intent=None, sentiment=None, since=None, until=None, limit=100):
+        clauses, params = [], []
+        if intent:
+            clauses.append("intent = ?")
+            params.append(intent)
+        if sentiment:
+            clauses.append("sentiment = ?")
+            params.append(sentiment)
+        self._time_filter(since, until, clauses, params)
+        return [dict(row) for row in self.connection.execute(
+            f'SELECT timestamp, "query", intent, sentiment, response, path, elapsed_ms FROM interaction '
+            f"{self._where(clauses)} ORDER BY timestamp DESC LIMIT ?", params + [limit])]
+
+    # Interaction counts per sentiment and intent
+    def sentiment_mix(self, since=None, until=None):
+        clauses, params = [], []
+        self._time_filter(since, until, clauses, params)
+        return [dict(row) for row in self.connection.execute(
+            f"SELECT sentiment, intent, COUNT(*) AS count FROM interaction {self._where(clauses)} "
+            f"GROUP BY sentiment, intent ORDER BY count DESC", params)]
+
+    # Count and latency per routing path (lines logged since the path suffix was added)
+    def path_latency(self, since=None, until=None):
+        clauses, params = ["path IS NOT NULL"], []
+        self._time_filter(since, until, clauses, params)
+        return [dict(row) for row in self.connection.execute(
+            f"SELECT path, COUNT(*) AS count, ROUND(AVG(elapsed_ms), 3) AS avg_ms, ROUND(MAX(elapsed_ms), 3) AS max_ms "
+            f"FROM interaction {self._where(clauses)} GROUP BY path ORDER BY count DESC", params)]
+
+    def feedback(self, since=None, until=None, limit=100):
+        clauses, params = [], []
+        self._time_filter(since, until, clauses, params)
+        return [dict(row) for row in self.connection.execute(
+            f"SELECT timestamp, feedback FROM feedback {self._where(clauses)} ORDER BY timestamp DESC LIMIT ?",
+            params + [limit])]
+
+
+# Function to print query rows as an aligned table
+def print_rows(rows):
+    if not rows:
+        print("(no rows)")
+        return
+    columns = list(rows[0])
+    widths = [max(len(column), *(len(str(row[column])) for row in rows)) for column in columns]
+    print("  ".join(column.ljust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(str(row[column]).ljust(width) for column, width in zip(columns, widths)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingest and query the interaction and feedback logs.")
+    parser.add_argument('--db', default=ANALYTICS_DB, help="Analytics database")
+    parser.add_argument('--json', action='store_true', help="Print query results as JSON")
+    parser.add_argument('--no-ingest', action='store_true', help="Query without ingesting new log lines first")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    ingest = commands.add_parser('ingest', help="Ingest lines appended since the last run")
+    ingest.add_argument('--interaction-log', default=LOG_FILE)
+    ingest.add_argument('--feedback-log', default=FEEDBACK_FILE)
+
+    def add_range(command):
+        command.add_argument('--since', help="Start time: ISO date/time or relative (7d, 24h, 30m)")
+        command.add_argument('--until', help="End time (exclusive)")
+        return command
+
+    add_range(commands.add_parser('intents', help="Intent mix per time bucket")).add_argument(
+        '--bucket', choices=list(BUCKETS), default='hour')
+    utterances = add_range(commands.add_parser('utterances', help="Utterances by intent and sentiment"))
+    utterances.add_argument('--intent')
+    utterances.add_argument('--sentiment')
+    utterances.add_argument('--limit', type=int, default=100)
+    add_range(commands.add_parser('sentiments', help="Counts per sentiment and intent"))
+    add_range(commands.add_parser('paths', help="Count and latency per routing path"))
+    add_range(commands.add_parser('feedback', help="Recent feedback")).add_argument('--limit', type=int, default=100)
+
+    args = parser.parse_args(argv)
+    store = LogStore(args.db)
+    try:
+        if args.command == 'ingest':
+            for kind, (ingested, skipped) in store.ingest_logs(args.interaction_log, args.feedback_log).items():
+                print(f"{kind}: {ingested} lines ingested, {skipped} skipped")
+            return
+
+        if not args.no_ingest:
+            store.ingest_logs()
+        since, until = parse_time(args.since), parse_time(args.until)
+        if args.command == 'intents':
+            rows = store.intent_mix(since, until, args.bucket)
+        elif args.command == 'utterances':
+            rows = store.utterances(args.intent, args.sentiment, since, until, args.limit)
+        elif args.command == 'sentiments':
+            rows = store.sentiment_mix(since, until)
+        elif args.command == 'paths':
+            rows = store.path_latency(since, until)
+        else:
+            rows = store.feedback(since, until, args.limit)
+
+        if args.json:
+            json.dump(rows, sys.stdout, indent=2)
+            print()
+        else:
+            print_rows(rows)
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,17 @@
 import pandas as pd
 from sklearn.feature_extraction.text import CountVectorizer
-from sklearn.model_selection import train_test_split
 from sklearn.naive_bayes import MultinomialNB
-from sklearn.metrics import accuracy_score, classification_report
+from sklearn.metrics import accuracy_score
 import joblib
+import json
 import os
+import sys
+
+# Share the serving tokenizer so the vectorizer sees the same tokens as api.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from preprocessing import normalize_text
+from inquiry_classifier import CONFIDENCE_THRESHOLD, MODEL_PATH, VECTORIZER_PATH, METADATA_PATH
+from inquiry_artifact import file_checksum
 
 # Load dataset
 data_path = 'inquiries.csv'  # Update path as needed
@@ -21,39 +28,43 @@ response_column = 'Response'  # This remains the same
 if inquiry_column not in df.columns or response_column not in df.columns:
     raise KeyError(f"Expected columns '{inquiry_column}' and '{response_column}' not found in the dataset.")
 
-# Preprocess the data
-df[inquiry_column] = df[inquiry_column].str.lower()
-
-# Vectorize the queries
-vectorizer = CountVectorizer(ngram_range=(1, 2), max_features=1000)
+# Vectorize the queries; normalize_text lowercases, tokenizes and drops stopwords.
+# At serving time api.py gives the classifier the same text: preprocess_text's tokens,
+# before the frequent words are removed for the fuzzy match.
+vectorizer = CountVectorizer(ngram_range=(1, 2), max_features=1000, preprocessor=normalize_text)
 X = vectorizer.fit_transform(df[inquiry_column])
 y = df[response_column]
 
-# Split data into training and test sets
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-# Initialize the model
-model = MultinomialNB()
-
-# Train the model
-model.fit(X_train, y_train)
-
-# Make predictions on the test set
-y_pred = model.predict(X_test)
-
-# Evaluate model accuracy
-accuracy = accuracy_score(y_test, y_pred)
-print(f"Model accuracy: {accuracy:.2f}")
+# The table has one question per answer, so a held-out split would only contain answers the
+# model has never seen. Fit on the whole table; the fuzzy match still catches whatever the
+# classifier isn't confident about. A small alpha keeps the probabilities of 50 one-row
+# classes from flattening out below the serving threshold.
+model = MultinomialNB(alpha=0.1)
+model.fit(X, y)
 
-# Print classification report
-print("\nClassification Report:")
-print(classification_report(y_test, y_pred))
+# How the model does on the questions themselves, and how confident it gets
+probabilities = model.predict_proba(X)
+accuracy = accuracy_score(y, model.classes_[probabilities.argmax(axis=1)])
+confidence = probabilities.max(axis=1)
+answered = (confidence >= CONFIDENCE_THRESHOLD).mean()
+print(f"Accuracy on the inquiry table: {accuracy:.2f}")
+print(f"Questions answered above the {CONFIDENCE_THRESHOLD} threshold: {answered:.0%}")
 
-# Save model and vectorizer if accuracy is acceptable
+# Save model and vectorizer if accuracy is acceptable, with the metadata the server
+# reads to decide whether loading the classifier is worth it
 if accuracy > 0.7:
-    os.makedirs('models', exist_ok=True)
-    joblib.dump(model, 'models/inquiry_intent_model.joblib')
-    joblib.dump(vectorizer, 'models/inquiry_vectorizer.joblib')
-    print("Model and vectorizer saved successfully.")
+    os.makedirs(os.path.dirname(MODEL_PATH), exist_ok=True)
+    joblib.dump(model, MODEL_PATH)
+    joblib.dump(vectorizer, VECTORIZER_PATH)
+    with open(METADATA_PATH, 'w', encoding='utf-8') as f:
+        json.dump({
+            "inquiries_checksum": file_checksum(data_path),
+            "questions": len(df),
+            "accuracy": round(float(accuracy), 4),
+            "best_confidence": round(float(confidence.max()), 4),
+            "threshold": CONFIDENCE_THRESHOLD,
+            "answered_above_threshold": round(float(answered), 4),
+        }, f, indent=2)
+    print("Model, vectorizer and metadata saved successfully.")
 else:
     print("Model accuracy is below the threshold. Consider improving the dataset or tuning the model.")
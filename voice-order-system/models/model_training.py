@@ -1,67 +1,28 @@
+import argparse
+import os
+import sys
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 from sklearn.model_selection import train_test_split
-from sklearn.feature_extraction.text import CountVectorizer
-from sklearn.linear_model import LogisticRegression
+from sklearn.feature_extraction.text import CountVectorizer, HashingVectorizer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 from sklearn.metrics import classification_report
-import nltk
-from nltk.corpus import stopwords
-import string
 import joblib
 from tqdm import tqdm
 
-# Initialize tqdm for pandas
-tqdm.pandas()
+# Share the serving tokenizer so training sees the same tokens as api.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from preprocessing import normalize_text
+from parallel import bounded_map
 
-# Download NLTK stopwords if not already done
-nltk.download('stopwords')
+REVIEW_PATH = r'C:\Users\Cedric Palapuz\Desktop\New folder\Yelp dataset\review.json'
+BUSINESS_PATH = r'C:\Users\Cedric Palapuz\Desktop\New folder\Yelp dataset\business.json'
 
-# Load the datasets
 chunk_size = 10000  # Number of rows to read at a time
-print("Loading reviews dataset in chunks...")
-review_chunks = pd.read_json(
-    r'C:\Users\Cedric Palapuz\Desktop\New folder\Yelp dataset\review.json', 
-    lines=True, 
-    chunksize=chunk_size
-)
-review_df = pd.concat(tqdm(review_chunks, desc="Processing review chunks"))  # Combine chunks into a single DataFrame
-
-print("Loading business dataset...")
-business_df = pd.read_json(r'C:\Users\Cedric Palapuz\Desktop\New folder\Yelp dataset\business.json', lines=True)
-
-# Filter for restaurant-related businesses
-print("Filtering for restaurants...")
-restaurants = business_df[business_df['categories'].str.contains('Restaurant', na=False)]
-restaurant_ids = restaurants['business_id'].unique()
-
-# Get reviews for those restaurants
-print("Filtering reviews for restaurants...")
-restaurant_reviews = review_df[review_df['business_id'].isin(restaurant_ids)]
-
-# Handle empty reviews
-restaurant_reviews = restaurant_reviews[restaurant_reviews['text'].notnull() & (restaurant_reviews['text'].str.strip() != '')]
-
-# Display the first few rows of reviews
-print("Sample of restaurant reviews loaded:")
-print(restaurant_reviews.head())
-
-# Set up stopwords as a set for faster lookup
-stop_words = set(stopwords.words('english'))
-
-# Define a function to preprocess the review text
-def preprocess_text(text):
-    text = text.lower()  # Convert to lowercase
-    text = text.translate(str.maketrans("", "", string.punctuation))  # Remove punctuation
-    tokens = text.split()  # Split into words
-    tokens = [word for word in tokens if word not in stop_words]  # Remove stopwords
-    return ' '.join(tokens)
-
-# Apply preprocessing to the review text with tqdm progress tracking
-print("Preprocessing review text...")
-restaurant_reviews['cleaned_text'] = restaurant_reviews['text'].progress_apply(preprocess_text)
-
-# Display the first few rows of cleaned reviews
-print("Sample of cleaned reviews:")
-print(restaurant_reviews[['text', 'cleaned_text']].head())
+
+INTENTS = ['Order Food', 'Request Service', 'Give Feedback', 'Make a Reservation', 'Other']
 
 # Define intent assignment function with keywords
 def assign_intent(text):
@@ -76,44 +37,157 @@ def assign_intent(text):
             return intent
     return 'Other'
 
-# Apply the intent assignment with tqdm for progress tracking
-print("Assigning intents to reviews...")
-restaurant_reviews['intent'] = restaurant_reviews['cleaned_text'].progress_apply(assign_intent)
-
-# Extract features and labels
-X = restaurant_reviews['cleaned_text']
-y = restaurant_reviews['intent']
-
-# Vectorize text features with progress feedback
-print("Vectorizing text...")
-vectorizer = CountVectorizer()
-X_vectorized = vectorizer.fit_transform(X)
-
-# Remove the conversion to a dense DataFrame to avoid memory issues
-# feature_df = pd.DataFrame(X_vectorized.toarray(), columns=vectorizer.get_feature_names_out())
-# Instead, print the shape to confirm dimensions
-print("Vectorized features shape:", X_vectorized.shape)
-
-# Split the data into training and testing sets
-print("Splitting data into train and test sets...")
-X_train, X_test, y_train, y_test = train_test_split(X_vectorized, y, test_size=0.2, random_state=42)
-
-# Train a logistic regression model with verbose progress
-print("Training model...")
-model = LogisticRegression(max_iter=200, verbose=1)
-model.fit(X_train, y_train)
-
-
-# Predict on the test set
-print("Predicting on test set...")
-y_pred = model.predict(X_test)
-
-# Print the classification report
-print("Classification Report:")
-print(classification_report(y_test, y_pred))
-
-# Save the model and vectorizer to disk
-joblib.dump(model, 'logistic_regression_model.joblib')
-joblib.dump(vectorizer, 'count_vectorizer.joblib')
-
-print("Model and vectorizer saved to disk.")
+# Function to clean and label a list of review texts (runs in a pool worker)
+def preprocess_and_label(texts):
+    cleaned = [normalize_text(text) for text in texts]
+    return cleaned, [assign_intent(text) for text in cleaned]
+
+# Function to read the restaurant business ids, one chunk of business.json at a time
+def load_restaurant_ids(business_path):
+    restaurant_ids = set()
+    for chunk in pd.read_json(business_path, lines=True, chunksize=chunk_size):
+        restaurants = chunk[chunk['categories'].str.contains('Restaurant', na=False)]
+        restaurant_ids.update(restaurants['business_id'])
+    return restaurant_ids
+
+# Function to yield the non-empty restaurant review texts chunk by chunk
+def iter_restaurant_reviews(review_path, restaurant_ids):
+    for chunk in pd.read_json(review_path, lines=True, chunksize=chunk_size):
+        chunk = chunk[chunk['business_id'].isin(restaurant_ids)]
+        chunk = chunk[chunk['text'].notnull() & (chunk['text'].str.strip() != '')]
+        if len(chunk):
+            yield chunk['text'].tolist()
+
+# Function to deterministically hold out a fraction of reviews for testing
+def is_test_row(text, test_size):
+    return zlib.crc32(text.encode('utf-8')) % 1000 < test_size * 1000
+
+# Out-of-core training: memory stays bounded by a few chunks regardless of dataset size.
+# Chunks are preprocessed in a process pool, vectorized with a stateless hashing
+# vectorizer and fed to an SGD logistic regression through partial_fit.
+def train_streaming(review_path, business_path, workers=None, test_size=0.2, n_features=2 ** 20):
+    print("Loading restaurant business ids...")
+    restaurant_ids = load_restaurant_ids(business_path)
+
+    vectorizer = HashingVectorizer(n_features=n_features, alternate_sign=False)
+    model = SGDClassifier(loss='log_loss')
+    y_test, y_pred = [], []
+
+    print("Training model on review chunks...")
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        batches = bounded_map(pool, preprocess_and_label, iter_restaurant_reviews(review_path, restaurant_ids), workers * 2)
+        for cleaned, labels in tqdm(batches, desc="Processing review chunks"):
+            test_rows = [is_test_row(text, test_size) for text in cleaned]
+            train = [(text, label) for text, label, test in zip(cleaned, labels, test_rows) if not test]
+            test = [(text, label) for text, label, test in zip(cleaned, labels, test_rows) if test]
+
+            # Score held-out rows with the model as trained so far (progressive validation)
+            if test and hasattr(model, 'classes_'):
+                y_pred.extend(model.predict(vectorizer.transform([text for text, _ in test])))
+                y_test.extend(label for _, label in test)
+            if train:
+                model.partial_fit(vectorizer.transform([text for text, _ in train]), [label for _, label in train],
+                                  classes=INTENTS)
+
+    if y_test:
+        print("Classification Report:")
+        print(classification_report(y_test, y_pred, zero_division=0))
+    return model, vectorizer
+
+# In-memory training on the full dataset
+def train_in_memory(review_path, business_path):
+    # Initialize tqdm for pandas
+    tqdm.pandas()
+
+    print("Loading reviews dataset in chunks...")
+    review_chunks = pd.read_json(review_path, lines=True, chunksize=chunk_size)
+    review_df = pd.concat(tqdm(review_chunks, desc="Processing review chunks"))  # Combine chunks into a single DataFrame
+
+    print("Loading business dataset...")
+    business_df = pd.read_json(business_path, lines=True)
+
+    # Filter for restaurant-related businesses
+    print("Filtering for restaurants...")
+    restaurants = business_df[business_df['categories'].str.contains('Restaurant', na=False)]
+    restaurant_ids = restaurants['business_id'].unique()
+
+    # Get reviews for those restaurants
+    print("Filtering reviews for restaurants...")
+    restaurant_reviews = review_df[review_df['business_id'].isin(restaurant_ids)]
+
+    # Handle empty reviews
+    restaurant_reviews = restaurant_reviews[restaurant_reviews['text'].notnull() & (restaurant_reviews['text'].str.strip() != '')]
+
+    # Display the first few rows of reviews
+    print("Sample of restaurant reviews loaded:")
+    print(restaurant_reviews.head())
+
+    # Apply preprocessing to the review text with tqdm progress tracking
+    print("Preprocessing review text...")
+    restaurant_reviews['cleaned_text'] = restaurant_reviews['text'].progress_apply(normalize_text)
+
+    # Display the first few rows of cleaned reviews
+    print("Sample of cleaned reviews:")
+    print(restaurant_reviews[['text', 'cleaned_text']].head())
+
+    # Apply the intent assignment with tqdm for progress tracking
+    print("Assigning intents to reviews...")
+    restaurant_reviews['intent'] = restaurant_reviews['cleaned_text'].progress_apply(assign_intent)
+
+    # Extract features and labels
+    X = restaurant_reviews['cleaned_text']
+    y = restaurant_reviews['intent']
+
+    # Vectorize text features with progress feedback
+    print("Vectorizing text...")
+    vectorizer = CountVectorizer()
+    X_vectorized = vectorizer.fit_transform(X)
+
+    # Remove the conversion to a dense DataFrame to avoid memory issues
+    # Instead, print the shape to confirm dimensions
+    print("Vectorized features shape:", X_vectorized.shape)
+
+    # Split the data into training and testing sets
+    print("Splitting data into train and test sets...")
+    X_train, X_test, y_train, y_test = train_test_split(X_vectorized, y, test_size=0.2, random_state=42)
+
+    # Train a logistic regression model with verbose progress
+    print("Training model...")
+    model = LogisticRegression(max_iter=200, verbose=1)
+    model.fit(X_train, y_train)
+
+    # Predict on the test set
+    print("Predicting on test set...")
+    y_pred = model.predict(X_test)
+
+    # Print the classification report
+    print("Classification Report:")
+    print(classification_report(y_test, y_pred))
+    return model, vectorizer
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the review intent model on the Yelp dataset.")
+    parser.add_argument('--reviews', default=REVIEW_PATH, help="Path to review.json (JSON lines)")
+    parser.add_argument('--business', default=BUSINESS_PATH, help="Path to business.json (JSON lines)")
+    parser.add_argument('--streaming', action='store_true', help="Train out-of-core with bounded memory")
+    parser.add_argument('--workers', type=int, default=None, help="Preprocessing processes (streaming mode)")
+    parser.add_argument('--output-dir', default='.', help="Directory for the saved model and vectorizer")
+    args = parser.parse_args()
+
+    if args.streaming:
+        model, vectorizer = train_streaming(args.reviews, args.business, workers=args.workers)
+        model_file, vectorizer_file = 'sgd_streaming_model.joblib', 'hashing_vectorizer.joblib'
+    else:
+        model, vectorizer = train_in_memory(args.reviews, args.business)
+        model_file, vectorizer_file = 'logistic_regression_model.joblib', 'count_vectorizer.joblib'
+
+    # Save the model and vectorizer to disk
+    os.makedirs(args.output_dir, exist_ok=True)
+    joblib.dump(model, os.path.join(args.output_dir, model_file))
+    joblib.dump(vectorizer, os.path.join(args.output_dir, vectorizer_file))
+
+    print("Model and vectorizer saved to disk.")
+
+if __name__ == "__main__":
+    main()
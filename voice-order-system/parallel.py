@@ -0,0 +1,14 @@
+from collections import deque
+
+
+# Function like pool.map that keeps at most max_pending items in flight, so a fast
+# reader (millions of transcripts, a whole review dataset) can't queue everything
+# in memory ahead of the workers. Results are yielded in input order.
+def bounded_map(pool, fn, iterable, max_pending):
+    pending = deque()
+    for item in iterable:
+        pending.append(pool.submit(fn, item))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
@@ -0,0 +1,60 @@
+import os
+import re
+import sys
+from collections import Counter
+
+# NLTK's English stopword list, frozen here so preprocessing needs no corpus download
+STOP_WORDS = frozenset("""
+i me my myself we our ours ourselves you you're you've you'll you'd your yours yourself yourselves he him his
+himself she she's her hers herself it it's its itself they them their theirs themselves what which who whom this
+that that'll these those am is are was were be been being have has had having do does did doing a an the and but
+if or because as until while of at by for with about against between into through during before after above below
+to from up down in out on off over under again further then once here there when where why how all any both each
+few more most other some such no nor not only own same so than too very s t can will just don don't should
+should've now d ll m o re ve y ain aren aren't couldn couldn't didn didn't doesn doesn't hadn hadn't hasn hasn't
+haven haven't isn isn't ma mightn mightn't mustn mustn't needn needn't shan shan't shouldn shouldn't wasn wasn't
+weren weren't won won't wouldn wouldn't
+""".split())
+
+# Alphabetic words only: letters between word boundaries, so tokens with digits
+# or underscores ("3pm", "room_12") are dropped whole, as isalpha() did with word_tokenize.
+# Apostrophes and hyphens split words ("don't" -> "don", "t"; "check-in" -> "check", "in").
+WORD_PATTERN = re.compile(r"\b[^\W\d_]+\b")
+
+# Set PREPROCESS_INTERN=1 to intern tokens, so repeated words share one string object
+INTERN_TOKENS = os.getenv("PREPROCESS_INTERN", "0") == "1"
+
+
+# Function to split lowercased text into alphabetic tokens
+def tokenize(text, intern=INTERN_TOKENS):
+    tokens = WORD_PATTERN.findall(text.lower())
+    return [sys.intern(token) for token in tokens] if intern else tokens
+
+
+# Function to preprocess text by removing stopwords
+def preprocess_text(text, intern=INTERN_TOKENS):
+    return [word for word in tokenize(text, intern) if word not in STOP_WORDS]
+
+
+# Function to preprocess a list of texts
+def preprocess_batch(texts, intern=INTERN_TOKENS):
+    findall = WORD_PATTERN.findall
+    if intern:
+        return [[sys.intern(word) for word in findall(text.lower()) if word not in STOP_WORDS] for text in texts]
+    return [[word for word in findall(text.lower()) if word not in STOP_WORDS] for text in texts]
+
+
+# Function to return the preprocessed text as one space-joined string (e.g. as a scikit-learn preprocessor)
+def normalize_text(text):
+    return ' '.join(preprocess_text(text))
+
+
+# Function to identify frequently occurring words from already tokenized questions
+def get_frequent_words(tokenized_questions, threshold=5):
+    word_count = Counter()
+
+    for words in tokenized_questions:
+        word_count.update(words)
+
+    # Filter out words that occur more than a certain threshold
+    return {word for word, count in word_count.items() if count >= threshold}
@@ -0,0 +1,258 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import itertools
+import tempfile
+from collections import Counter, deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from parallel import bounded_map
+
+# Offline re-classification of historical transcripts, to see how a change to
+# intents.json, inquiries.csv or the classifier models would re-route past traffic:
+#
+#   python reclassify.py --log logs/interaction_logs.txt --inquiries new_inquiries.csv > diff.jsonl
+#   python reclassify.py --file transcripts.txt --intents new_intents.json --baseline
+#
+# Transcripts are streamed in chunks to a process pool. Each worker builds the routing
+# structures once (the inquiry artifacts are built up front by the parent and memory-mapped
+# by the workers) and runs the same routing.determine_intent_batch pipeline as api.py, without
+# importing api itself, so it never loads the served models or opens the user database. By default
+# the new routing is compared with what was logged at the time; with --baseline it is
+# compared with routing recomputed from the baseline files, which also gives score changes.
+
+CHUNK_SIZE = 500
+
+Record = namedtuple("Record", ["timestamp", "transcript", "intent", "response"])
+
+# Worker state: pipeline name -> (knowledge snapshot, classifier, response cache)
+pipelines = None
+
+
+# Function to read (timestamp, transcript, logged intent, logged response) from a text interaction log
+def read_log_records(path):
+    from log_analytics import read_log
+
+    for match in read_log(path, "interaction"):
+        yield Record(match["timestamp"], match["query"], match["intent"], match["response"])
+
+
+# Function to read records from the SQLite interaction log written by user_log
+def read_db_records(path):
+    connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        yield from (Record(*row) for row in connection.execute(
+            'SELECT timestamp, "query", intent, response FROM user_interaction ORDER BY id'))
+    finally:
+        connection.close()
+
+
+# Function to read one transcript per line from a plain text file (nothing logged to compare with)
+def read_file_records(path):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield Record(None, line.strip(), None, None)
+
+
+def init_worker(configs):
+    global pipelines
+    import metrics
+    from knowledge_base import KnowledgeBase
+    from inquiry_classifier import InquiryClassifier
+    from response_cache import ResponseCache
+
+    metrics.ENABLED = False
+    pipelines = {}
+    for name, config in configs.items():
+        knowledge_base = KnowledgeBase(config["inquiries"], config["intents"], config["artifact"])
+        classifier = InquiryClassifier(config["model"], config["vectorizer"], config["metadata"],
+                                       enabled=config["classifier"])
+        classifier.load()
+        # No response cache: repeated transcripts must report the stage that routes them
+        pipelines[name] = (knowledge_base.current, classifier, ResponseCache(max_entries=0, shared_db=None))
+
+
+# Function to route a chunk of transcripts through every configured pipeline
+def classify_chunk(transcripts):
+    import routing
+
+    return {name: routing.determine_intent_batch(transcripts, snapshot, classifier, cache)
+            for name, (snapshot, classifier, cache) in pipelines.items()}
+
+
+def chunked(records, size):
+    records = iter(records)
+    while True:
+        chunk = list(itertools.islice(records, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# Running totals for the summary report
+class DiffSummary:
+    def __init__(self):
+        self.records = 0
+        self.compared = 0
+        self.changed = Counter()
+        self.transitions = Counter()
+        self.paths = Counter()
+        self.score_deltas = []
+
+    def add(self, old, new, changed):
+        self.records += 1
+        self.paths[new["path"]] += 1
+        if old["intent"] is None and old["response"] is None:
+            return
+        self.compared += 1
+        self.changed.update(changed)
+        if changed:
+            self.changed["any"] += 1
+        if "intent" in changed:
+            self.transitions[f"{old['intent']} -> {new['intent']}"] += 1
+        if old.get("score") is not None and new["score"] is not None:
+            self.score_deltas.append(new["score"] - old["score"])
+
+    def report(self, elapsed):
+        deltas = self.score_deltas
+        return {
+            "records": self.records,
+            "compared": self.compared,
+            "changed": dict(self.changed),
+            "intent_transitions": dict(self.transitions.most_common(20)),
+            "new_paths": dict(self.paths),
+            "score_delta": {
+                "mean": round(sum(deltas) / len(deltas), 3),
+                "max_increase": max(deltas),
+                "max_decrease": min(deltas),
+            } if deltas else None,
+            "elapsed_seconds": round(elapsed, 3),
+            "records_per_second": round(self.records / elapsed, 1) if elapsed else None,
+        }
+
+
+def routed(intent, response, score, path):
+    return {"intent": intent, "response": response, "score": score, "path": path}
+
+
+# Function to stream (record, old result, new result, changed fields) for every record
+def reclassify(records, configs, workers, chunk_size=CHUNK_SIZE):
+    # Imported before the pool starts so forked workers inherit it instead of importing it again
+    import routing  # noqa: F401
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(configs,)) as pool:
+        chunks = chunked(records, chunk_size)
+        # Keep each chunk's records in the parent; only the transcripts go to the workers
+        pending_chunks = deque()
+
+        def transcripts():
+            for chunk in chunks:
+                pending_chunks.append(chunk)
+                yield [record.transcript for record in chunk]
+
+        for results in bounded_map(pool, classify_chunk, transcripts(), workers * 2):
+            chunk = pending_chunks.popleft()
+            baseline = results.get("baseline")
+            for i, record in enumerate(chunk):
+                new = routed(*results["new"][i])
+                if baseline is not None:
+                    old = routed(*baseline[i])
+                    fields = ("intent", "response", "score")
+                else:
+                    old = {"intent": record.intent, "response": record.response}
+                    fields = ("intent", "response")
+                changed = [field for field in fields if old[field] != new[field]] if old["intent"] or old["response"] else []
+                yield record, old, new, changed
+
+
+# Function to describe one pipeline, building its inquiry artifact ahead of the workers
+def pipeline_config(inquiries, intents, model, vectorizer, metadata, classifier, artifact_dir, name):
+    from inquiry_artifact import build_artifact
+
+    artifact = os.path.join(artifact_dir, f"{name}_inquiry_artifact.joblib")
+    build_artifact(inquiries, artifact)
+    return {"inquiries": inquiries, "intents": intents, "model": model, "vectorizer": vectorizer, "metadata": metadata,
+            "classifier": classifier, "artifact": artifact}
+
+
+def main():
+    from inquiry_classifier import MODEL_PATH, VECTORIZER_PATH, METADATA_PATH
+
+    parser = argparse.ArgumentParser(description="Re-route historical transcripts and report what changes.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--log', help="Text interaction log (logs/interaction_logs.txt)")
+    source.add_argument('--db', help="SQLite interaction log (instance/interactions.db)")
+    source.add_argument('--file', help="Plain text file with one transcript per line")
+
+    parser.add_argument('--inquiries', default='inquiries.csv', help="Candidate inquiry table")
+    parser.add_argument('--intents', default='intents.json', help="Candidate intent tables")
+    parser.add_argument('--model', default=MODEL_PATH, help="Candidate inquiry classifier model")
+    parser.add_argument('--vectorizer', default=VECTORIZER_PATH, help="Candidate inquiry classifier vectorizer")
+    parser.add_argument('--metadata', default=METADATA_PATH, help="Candidate inquiry classifier training metadata")
+    parser.add_argument('--no-classifier', action='store_true', help="Route without the inquiry classifier")
+
+    parser.add_argument('--baseline', action='store_true',
+                        help="Compare with routing recomputed from the baseline files instead of the logged results")
+    parser.add_argument('--baseline-inquiries', default='inquiries.csv')
+    parser.add_argument('--baseline-intents', default='intents.json')
+    parser.add_argument('--baseline-model', default=MODEL_PATH)
+    parser.add_argument('--baseline-vectorizer', default=VECTORIZER_PATH)
+    parser.add_argument('--baseline-metadata', default=METADATA_PATH)
+
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--all', action='store_true', help="Write every record, not only changed ones")
+    parser.add_argument('--output', help="JSON lines diff report (default: stdout)")
+    parser.add_argument('--summary', help="Also write the summary as JSON to this file")
+    args = parser.parse_args()
+
+    # Paths given on the command line are relative to where the job was started
+    paths = ['log', 'db', 'file', 'inquiries', 'intents', 'model', 'vectorizer', 'metadata', 'baseline_inquiries',
+             'baseline_intents', 'baseline_model', 'baseline_vectorizer', 'baseline_metadata', 'output', 'summary']
+    for name in paths:
+        if getattr(args, name):
+            setattr(args, name, os.path.abspath(getattr(args, name)))
+    # Run from the app directory, like api.py, so relative data paths resolve in the workers
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    if args.log:
+        records = read_log_records(args.log)
+    elif args.db:
+        records = read_db_records(args.db)
+    else:
+        records = read_file_records(args.file)
+
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    summary = DiffSummary()
+    started = time.perf_counter()
+    try:
+        with tempfile.TemporaryDirectory(prefix="reclassify-") as artifact_dir:
+            configs = {"new": pipeline_config(args.inquiries, args.intents, args.model, args.vectorizer, args.metadata,
+                                              not args.no_classifier, artifact_dir, "new")}
+            if args.baseline:
+                configs["baseline"] = pipeline_config(args.baseline_inquiries, args.baseline_intents,
+                                                      args.baseline_model, args.baseline_vectorizer, args.baseline_metadata,
+                                                      not args.no_classifier, artifact_dir, "baseline")
+
+            for record, old, new, changed in reclassify(records, configs, args.workers, args.chunk_size):
+                summary.add(old, new, changed)
+                if changed or args.all:
+                    output.write(json.dumps({"timestamp": record.timestamp, "transcript": record.transcript,
+                                             "changed": changed, "old": old, "new": new}) + "\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    report = summary.report(time.perf_counter() - started)
+    print(json.dumps(report, indent=2), file=sys.stderr)
+    if args.summary:
+        with open(args.summary, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
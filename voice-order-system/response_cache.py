@@ -0,0 +1,167 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+
+MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_SIZE", "10000"))
+MAX_BYTES = int(os.getenv("RESPONSE_CACHE_BYTES", str(16 * 1024 * 1024)))
+TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+
+# Optional SQLite file shared by every worker on the host, e.g. instance/response_cache.db
+SHARED_DB = os.getenv("RESPONSE_CACHE_DB")
+
+
+# Cache shared between processes through a local SQLite file (WAL mode)
+class SQLiteCacheBackend:
+    def __init__(self, db_path, ttl=TTL_SECONDS):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.local = threading.local()
+        self.puts = 0
+        connection = self._connection()
+        connection.execute("""CREATE TABLE IF NOT EXISTS response_cache (
+            key TEXT PRIMARY KEY,
+            value TEXT,
+            expires REAL
+        )""")
+        connection.commit()
+
+    def _connection(self):
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            connection = sqlite3.connect(self.db_path, timeout=1.0)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=OFF")
+            self.local.connection = connection
+        return connection
+
+    def get(self, key):
+        try:
+            row = self._connection().execute(
+                "SELECT value FROM response_cache WHERE key = ? AND expires > ?", (key, time.time())).fetchone()
+        except sqlite3.Error:
+            return None
+        return tuple(json.loads(row[0])) if row else None
+
+    def put(self, key, value):
+        try:
+            connection = self._connection()
+            connection.execute("INSERT OR REPLACE INTO response_cache (key, value, expires) VALUES (?, ?, ?)",
+                               (key, json.dumps(value), time.time() + self.ttl))
+            # Purge expired rows now and then so the file doesn't grow without bound
+            self.puts += 1
+            if self.puts % 1000 == 0:
+                connection.execute("DELETE FROM response_cache WHERE expires <= ?", (time.time(),))
+            connection.commit()
+        except sqlite3.Error:
+            pass
+
+    def clear(self):
+        try:
+            connection = self._connection()
+            connection.execute("DELETE FROM response_cache")
+            connection.commit()
+        except sqlite3.Error:
+            pass
+
+
+# LRU + TTL cache of (intent, response, score) tuples in front of intent routing, bounded by
+# entry count and approximate bytes. Entries are keyed by the knowledge base
+# token, so editing the inquiry or intent tables invalidates them automatically.
+class ResponseCache:
+    def __init__(self, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES, ttl=TTL_SECONDS, shared_db=SHARED_DB):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.token = None
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.backend = SQLiteCacheBackend(shared_db, ttl) if shared_db else None
+
+    @staticmethod
+    def make_key(token, processed_input, keyword_hits):
+        return json.dumps([token, processed_input, sorted(keyword_hits)])
+
+    # Drop every local entry when the knowledge base changes
+    def _bind(self, token):
+        if token != self.token:
+            self.entries.clear()
+            self.bytes = 0
+            self.token = token
+
+    def get(self, token, processed_input, keyword_hits):
+        if self.max_entries <= 0:
+            return None
+        key = self.make_key(token, processed_input, keyword_hits)
+        with self.lock:
+            self._bind(token)
+            entry = self.entries.get(key)
+            if entry is not None:
+                value, expires, size = entry
+                if expires > time.monotonic():
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self.entries[key]
+                self.bytes -= size
+
+        if self.backend is not None:
+            value = self.backend.get(key)
+            if value is not None:
+                with self.lock:
+                    self.shared_hits += 1
+                self._store(token, key, value)
+                return value
+
+        with self.lock:
+            self.misses += 1
+        return None
+
+    def put(self, token, processed_input, keyword_hits, value):
+        if self.max_entries <= 0:
+            return
+        key = self.make_key(token, processed_input, keyword_hits)
+        self._store(token, key, value)
+        if self.backend is not None:
+            self.backend.put(key, value)
+
+    def _store(self, token, key, value):
+        size = len(key) + sum(len(str(part)) for part in value)
+        with self.lock:
+            self._bind(token)
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[2]
+            self.entries[key] = (value, time.monotonic() + self.ttl, size)
+            self.bytes += size
+            while self.entries and (len(self.entries) > self.max_entries or self.bytes > self.max_bytes):
+                _, (_, _, evicted_size) = self.entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+        if self.backend is not None:
+            self.backend.clear()
+
+    def stats(self):
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "bytes": self.bytes,
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "shared": self.backend is not None,
+            }
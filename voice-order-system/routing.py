@@ -0,0 +1,86 @@
+import metrics
+from inquiry_index import INQUIRY_MATCH_THRESHOLD
+from preprocessing import preprocess_batch
+
+# Intent routing pipeline shared by api.py and offline jobs such as reclassify.py.
+# It only works on the snapshot, classifier and cache it is given, so importing it
+# doesn't load the served knowledge base or classifier or touch the user database.
+
+STAGE_SECONDS = metrics.histogram("voice_order_stage_seconds", "Time spent in each intent pipeline stage", ("stage",))
+
+FREQUENT_WORDS_ERROR = "Error: Frequent words not loaded properly"
+
+# Intents reported under a shorter name than their keyword table entry
+INTENT_ALIASES = {"Yes/No Response": "Yes/No"}
+
+# Function to join already tokenized inputs without the snapshot's frequent words
+def strip_frequent_words(tokenized, snapshot):
+    frequent_words = snapshot.frequent_words
+    return [' '.join([word for word in words if word not in frequent_words]) for words in tokenized]
+
+# Function to pick the intent from an inquiry match (or None) and the keyword hits
+def resolve_intent(inquiry_match, keyword_hits, snapshot):
+    if inquiry_match and inquiry_match[2] >= INQUIRY_MATCH_THRESHOLD:
+        return "Inquiry", inquiry_match[1]
+
+    # Apply the priority order to the keyword hits
+    for intent in snapshot.intent_priority:
+        if intent in keyword_hits:
+            return INTENT_ALIASES.get(intent, intent), snapshot.intent_responses.get(intent, "I'm sorry, I didn't quite understand your request.")
+
+    return "Unknown", "I'm sorry, I didn't quite understand your request."
+
+# Function to name the stage that produced a routed intent
+def routing_path(intent):
+    if intent == "Inquiry":
+        return "inquiry"
+    if intent == "Unknown":
+        return "unknown"
+    return "keyword"
+
+# Function to determine (intent, response, match score, path) for many inputs at once
+# with the given knowledge snapshot, inquiry classifier and response cache.
+# path names the stage that answered: cache, classifier, inquiry, keyword or unknown.
+def determine_intent_batch(user_inputs, snapshot, classifier, cache):
+    user_inputs = [user_input.lower() for user_input in user_inputs]
+    if not snapshot.frequent_words:
+        return [("Inquiry", FREQUENT_WORDS_ERROR, None, "inquiry")] * len(user_inputs)
+
+    # Stage 1: preprocessing and keyword hits (one automaton pass per input).
+    # Together they determine the routing, so they also form the cache key.
+    # The classifier, when active, reads the text before frequent words are removed, as
+    # in training; that text then keys the cache, since it also determines the fuzzy input.
+    use_classifier = classifier.load()
+    with STAGE_SECONDS.time("preprocess"):
+        tokenized = preprocess_batch(user_inputs)
+        processed = strip_frequent_words(tokenized, snapshot)
+        keys = [' '.join(words) for words in tokenized] if use_classifier else processed
+    with STAGE_SECONDS.time("keywords"):
+        keyword_hits = [snapshot.intent_matcher.find_intents(user_input) for user_input in user_inputs]
+
+    results = []
+    with STAGE_SECONDS.time("cache"):
+        for key, hits in zip(keys, keyword_hits):
+            cached = cache.get(snapshot.cache_token, key, hits)
+            results.append(cached[:3] + ("cache",) if cached else None)
+
+    # Stage 2: the trained classifier answers confident inputs in one vectorized call
+    if use_classifier:
+        misses = [i for i, result in enumerate(results) if result is None and keys[i]]
+        with STAGE_SECONDS.time("classifier"):
+            predictions = classifier.predict_batch([keys[i] for i in misses])
+        for i, (response, confidence) in zip(misses, predictions):
+            if response is not None:
+                results[i] = ("Inquiry", response, round(confidence * 100), "classifier")
+                cache.put(snapshot.cache_token, keys[i], keyword_hits[i], results[i])
+    misses = [i for i, result in enumerate(results) if result is None]
+
+    # Stage 3: vectorized inquiry search, then keyword routing, for everything left
+    with STAGE_SECONDS.time("inquiry_search"):
+        matches = snapshot.inquiry_index.search_batch([processed[i] for i in misses], k=1)
+    for i, match in zip(misses, matches):
+        match = match[0] if match else None
+        intent, response = resolve_intent(match, keyword_hits[i], snapshot)
+        results[i] = (intent, response, match[2] if match else None, routing_path(intent))
+        cache.put(snapshot.cache_token, keys[i], keyword_hits[i], results[i])
+    return results
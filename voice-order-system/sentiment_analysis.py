@@ -1,15 +1,213 @@
-from transformers import pipeline
+import os
+import threading
+import queue
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import metrics
+
+MODEL_NAME = "distilbert-base-uncased-finetuned-sst-2-english"
+
+# "torch" runs the model with dynamic int8 quantization, "onnx" uses ONNX Runtime if installed
+SENTIMENT_BACKEND = os.getenv("SENTIMENT_BACKEND", "torch")
+
+# Micro-batching: under concurrent load, wait up to this long for more requests before
+# running a batch; a request that arrives alone runs right away
+BATCH_WAIT_MS = float(os.getenv("SENTIMENT_BATCH_WAIT_MS", "5"))
+MAX_BATCH_SIZE = int(os.getenv("SENTIMENT_MAX_BATCH_SIZE", "32"))
+CACHE_SIZE = int(os.getenv("SENTIMENT_CACHE_SIZE", "4096"))
+
+MODEL_SECONDS = metrics.histogram("sentiment_model_seconds", "Sentiment model forward pass per batch")
+BATCH_SIZE = metrics.histogram("sentiment_batch_size", "Texts per sentiment model batch",
+                               buckets=(1, 2, 4, 8, 16, 32, 64, 128))
+CACHE_TOTAL = metrics.counter("sentiment_cache_total", "Sentiment cache lookups", ("result",))
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+
+# Function to build the sentiment pipeline for the configured backend
+def _build_pipeline():
+    from transformers import AutoTokenizer, pipeline
+
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+
+    if SENTIMENT_BACKEND == "onnx":
+        try:
+            from optimum.onnxruntime import ORTModelForSequenceClassification
+            model = ORTModelForSequenceClassification.from_pretrained(MODEL_NAME, export=True)
+            return pipeline("sentiment-analysis", model=model, tokenizer=tokenizer)
+        except ImportError:
+            print("ONNX Runtime backend not available, falling back to torch.")
+
+    import torch
+    from transformers import AutoModelForSequenceClassification
+
+    model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME)
+    model.eval()
+    # Int8 weights for the linear layers; activations stay float on CPU
+    model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return pipeline("sentiment-analysis", model=model, tokenizer=tokenizer)
+
+
+# Function to load the model on first use instead of at import time
+def get_sentiment_pipeline():
+    global _pipeline
+    if _pipeline is None:
+        with _pipeline_lock:
+            if _pipeline is None:
+                _pipeline = _build_pipeline()
+    return _pipeline
+
+
+# Function to load the model ahead of the first request (e.g. from a worker start hook)
+def warm_up():
+    get_sentiment_pipeline()
+    analyze_sentiment_batch(["warm up"])
+
+
+# Function to build the cache key: lowercased with whitespace collapsed, so trivially
+# different phrasings share a cache entry (words are kept, unlike preprocessing.normalize_text)
+def sentiment_key(text):
+    return ' '.join(text.lower().split())
+
+
+# Thread-safe LRU cache of normalized text -> (label, score)
+class SentimentCache:
+    def __init__(self, max_size=CACHE_SIZE):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            result = self.entries.get(key)
+            if result is not None:
+                self.entries.move_to_end(key)
+            return result
+
+    def put(self, key, result):
+        if self.max_size <= 0:
+            return
+        with self.lock:
+            self.entries[key] = result
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+sentiment_cache = SentimentCache()
+
+
+# Function to run the model over already-normalized, uncached texts
+def _run_model(texts):
+    BATCH_SIZE.observe(len(texts))
+    with MODEL_SECONDS.time():
+        results = get_sentiment_pipeline()(texts, batch_size=len(texts), padding=True, truncation=True)
+    return [(result['label'], result['score']) for result in results]
+
+
+# Collects concurrent analyze_sentiment calls into one padded forward pass
+class MicroBatcher:
+    def __init__(self, max_batch_size=MAX_BATCH_SIZE, wait_ms=BATCH_WAIT_MS):
+        self.max_batch_size = max_batch_size
+        self.wait_seconds = wait_ms / 1000.0
+        self.requests = queue.Queue()
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def submit(self, text):
+        self._ensure_started()
+        future = Future()
+        self.requests.put((text, future))
+        return future
+
+    def _ensure_started(self):
+        if self.thread is None:
+            with self.lock:
+                if self.thread is None:
+                    self.thread = threading.Thread(target=self._run, name="sentiment-batcher", daemon=True)
+                    self.thread.start()
+
+    def _collect(self):
+        batch = [self.requests.get()]
+        try:
+            # Take whatever queued up meanwhile; if nothing did, there is no one to wait for
+            while len(batch) < self.max_batch_size:
+                batch.append(self.requests.get_nowait())
+        except queue.Empty:
+            pass
+        if len(batch) == 1:
+            return batch
+        try:
+            while len(batch) < self.max_batch_size:
+                batch.append(self.requests.get(timeout=self.wait_seconds))
+        except queue.Empty:
+            pass
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            # Identical texts in the same batch only go through the model once
+            unique_texts = list(dict.fromkeys(text for text, _ in batch))
+            try:
+                results = dict(zip(unique_texts, _run_model(unique_texts)))
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for text, future in batch:
+                future.set_result(results[text])
+
+
+batcher = MicroBatcher()
+
+
+# Function to analyze a list of texts, returning (label, score) tuples in order
+def analyze_sentiment_batch(texts):
+    keys = [sentiment_key(text) for text in texts]
+    results = {}
+    misses = []
+    for key in dict.fromkeys(keys):
+        cached = sentiment_cache.get(key)
+        if cached is not None:
+            results[key] = cached
+        else:
+            misses.append(key)
+    CACHE_TOTAL.inc("hit", amount=len(results))
+    CACHE_TOTAL.inc("miss", amount=len(misses))
+
+    # Bounded forward passes, so a large batch request doesn't pad one huge tensor
+    for start in range(0, len(misses), MAX_BATCH_SIZE):
+        chunk = misses[start:start + MAX_BATCH_SIZE]
+        try:
+            for key, result in zip(chunk, _run_model(chunk)):
+                sentiment_cache.put(key, result)
+                results[key] = result
+        except Exception as e:
+            print(f"Error analyzing sentiment: {e}")
+            break
+
+    return [results.get(key, (None, None)) for key in keys]
 
-# Load sentiment analysis pipeline with explicit model
-sentiment_analyzer = pipeline("sentiment-analysis", model="distilbert-base-uncased-finetuned-sst-2-english")
 
 def analyze_sentiment(text):
     try:
-        # Analyze the sentiment of the input text
-        result = sentiment_analyzer(text)
-        sentiment_label = result[0]['label']  # 'POSITIVE' or 'NEGATIVE'
-        sentiment_score = result[0]['score']  # Confidence score
+        key = sentiment_key(text)
+        cached = sentiment_cache.get(key)
+        if cached is not None:
+            CACHE_TOTAL.inc("hit")
+            return cached
+        CACHE_TOTAL.inc("miss")
 
+        # Analyze the sentiment of the input text alongside any concurrent requests
+        sentiment_label, sentiment_score = batcher.submit(key).result()  # 'POSITIVE' or 'NEGATIVE', confidence
+        sentiment_cache.put(key, (sentiment_label, sentiment_score))
         return sentiment_label, sentiment_score
     except Exception as e:
         print(f"Error analyzing sentiment: {e}")
@@ -17,14 +215,14 @@ def analyze_sentiment(text):
 
 def generate_response_based_on_sentiment(text):
     sentiment, score = analyze_sentiment(text)
-    
+
     if sentiment == "POSITIVE":
         response = f"Thank you for sharing that! We're so glad you had a great experience. Your feedback means a lot to us!"
-    
+
     elif sentiment == "NEGATIVE":
         response = f"We're really sorry to hear that. We value your feedback and will work on improving. Can you please share more details about your experience?"
-    
+
     else:
         response = "Thank you for your input! If you have any specific requests or concerns, feel free to let us know."
-    
+
     return response
\ No newline at end of file
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The modules live next to each other rather than in a package, as api.py imports them
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "models"))
@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+import model_training
+
+REVIEWS = {
+    "Order Food": ["I want to order the pasta", "Can you bring me a burger", "Please get me some fries"],
+    "Give Feedback": ["I am not happy with the service", "I have a complaint about the noise",
+                      "There is an issue with my table"],
+    "Make a Reservation": ["I would like to book a table", "Can I reserve a spot tonight",
+                           "Is my reservation confirmed"],
+    "Other": ["The view was lovely", "Great atmosphere overall", "We enjoyed the music"],
+}
+
+
+# Small Yelp-shaped dataset: two restaurants, one shop whose reviews must be skipped, and empty reviews
+@pytest.fixture
+def yelp_dataset(tmp_path):
+    business_path = tmp_path / "business.json"
+    review_path = tmp_path / "review.json"
+    businesses = [
+        {"business_id": "r1", "categories": "Restaurants, Italian"},
+        {"business_id": "r2", "categories": "Food, Restaurants"},
+        {"business_id": "s1", "categories": "Shopping"},
+        {"business_id": "s2", "categories": None},
+    ]
+    reviews = []
+    for repeat in range(20):
+        for texts in REVIEWS.values():
+            for i, text in enumerate(texts):
+                reviews.append({"business_id": "r1" if i % 2 else "r2", "text": f"{text} {repeat}"})
+        reviews.append({"business_id": "s1", "text": "I want to order a new lamp"})
+        reviews.append({"business_id": "r1", "text": "   "})
+    business_path.write_text("\n".join(json.dumps(row) for row in businesses) + "\n")
+    review_path.write_text("\n".join(json.dumps(row) for row in reviews) + "\n")
+    return str(review_path), str(business_path), len(reviews)
+
+
+def test_restaurant_reviews_are_streamed_in_chunks(yelp_dataset, monkeypatch):
+    review_path, business_path, _ = yelp_dataset
+    monkeypatch.setattr(model_training, "chunk_size", 50)
+
+    restaurant_ids = model_training.load_restaurant_ids(business_path)
+    chunks = list(model_training.iter_restaurant_reviews(review_path, restaurant_ids))
+
+    assert restaurant_ids == {"r1", "r2"}
+    assert len(chunks) > 1
+    texts = [text for chunk in chunks for text in chunk]
+    assert len(texts) == 20 * sum(len(texts) for texts in REVIEWS.values())
+    assert not any("lamp" in text or not text.strip() for text in texts)
+
+
+def test_train_streaming_learns_the_keyword_intents(yelp_dataset, monkeypatch):
+    review_path, business_path, _ = yelp_dataset
+    monkeypatch.setattr(model_training, "chunk_size", 50)
+
+    model, vectorizer = model_training.train_streaming(review_path, business_path, workers=1, n_features=2 ** 12)
+
+    assert sorted(model.classes_) == sorted(model_training.INTENTS)
+    texts = [model_training.normalize_text(text) for texts in REVIEWS.values() for text in texts]
+    expected = [model_training.assign_intent(text) for text in texts]
+    predicted = model.predict(vectorizer.transform(texts))
+    assert sum(p == e for p, e in zip(predicted, expected)) / len(texts) >= 0.75
+
+
+def test_held_out_rows_are_deterministic():
+    rows = [f"review number {i}" for i in range(1000)]
+    held_out = [model_training.is_test_row(text, 0.2) for text in rows]
+
+    assert held_out == [model_training.is_test_row(text, 0.2) for text in rows]
+    assert 0.1 < sum(held_out) / len(rows) < 0.3
@@ -0,0 +1,84 @@
+import io
+import sys
+import wave
+
+import numpy as np
+
+import transcribe
+from transcribe import EnergyVAD, StubRecognizer, pcm_frames, segment_speech, stream_transcripts
+
+
+# Function to synthesize 16-bit PCM: (seconds, loud) parts, tone for speech and faint noise for silence
+def synthetic_audio(parts, sample_rate=transcribe.SAMPLE_RATE, seed=0):
+    rng = np.random.default_rng(seed)
+    chunks = []
+    for seconds, loud in parts:
+        t = np.arange(int(seconds * sample_rate)) / sample_rate
+        if loud:
+            chunk = 4000 * np.sin(2 * np.pi * 220 * t) + rng.normal(0, 200, len(t))
+        else:
+            chunk = rng.normal(0, 30, len(t))
+        chunks.append(chunk)
+    return np.concatenate(chunks).astype(np.int16).tobytes()
+
+
+def wav_file(pcm, sample_rate):
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(transcribe.SAMPLE_WIDTH)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm)
+    buffer.seek(0)
+    return buffer
+
+
+def test_segments_follow_the_speech():
+    pcm = synthetic_audio([(0.6, False), (1.0, True), (0.8, False), (0.7, True), (0.8, False)])
+
+    segments = list(segment_speech(pcm_frames(pcm), EnergyVAD()))
+
+    assert [segment.index for segment in segments] == [0, 1]
+    assert abs(segments[0].start - 0.6) < 0.35 and abs(segments[0].end - 1.6) < 0.35
+    assert abs(segments[1].start - 2.4) < 0.35 and abs(segments[1].end - 3.1) < 0.35
+
+
+def test_audio_that_starts_with_speech_keeps_its_first_utterance():
+    pcm = synthetic_audio([(1.0, True), (0.8, False), (1.0, True), (0.8, False)])
+
+    segments = list(segment_speech(pcm_frames(pcm), EnergyVAD()))
+
+    assert len(segments) == 2
+    assert segments[0].start == 0.0
+
+
+def test_stream_transcripts_yields_partial_and_full_text():
+    pcm = synthetic_audio([(0.5, False), (0.8, True), (0.8, False), (0.8, True), (0.5, False)])
+    recognizer = StubRecognizer(["extra towels", "to room twelve"])
+
+    transcripts = list(stream_transcripts(pcm_frames(pcm), recognizer, vad=EnergyVAD()))
+
+    assert [transcript.text for transcript in transcripts] == ["extra towels", "to room twelve"]
+    assert transcripts[-1].full_text == "extra towels to room twelve"
+    assert recognizer.calls == 2
+
+
+def test_transcribe_file_at_a_rate_webrtc_rejects(monkeypatch):
+    # Even with webrtcvad installed, 44.1 kHz audio must go to the energy detector
+    class FakeWebRTC:
+        class Vad:
+            def __init__(self, aggressiveness):
+                pass
+
+            def is_speech(self, frame, sample_rate):
+                raise AssertionError("webrtcvad called with an unsupported sample rate")
+
+    monkeypatch.setitem(sys.modules, "webrtcvad", FakeWebRTC)
+    sample_rate = 44100
+    pcm = synthetic_audio([(0.5, False), (0.8, True), (0.6, False)], sample_rate)
+
+    text = transcribe.transcribe_file(wav_file(pcm, sample_rate), StubRecognizer(["hello"]))
+
+    assert text == "hello"
+    assert isinstance(transcribe.default_vad(16000), transcribe.WebRTCVAD)
+    assert isinstance(transcribe.default_vad(sample_rate), EnergyVAD)
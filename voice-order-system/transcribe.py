@@ -1,5 +1,13 @@
+import collections
+import wave
+
+import numpy as np
 import speech_recognition as sr
 
+SAMPLE_RATE = 16000
+FRAME_MS = 30
+SAMPLE_WIDTH = 2  # 16-bit PCM
+
 def record_and_transcribe():
     # Initialize recognizer
     recognizer = sr.Recognizer()
@@ -17,3 +25,239 @@ def record_and_transcribe():
         return "Could not understand audio."
     except sr.RequestError:
         return "Could not request results from the speech recognition service."
+
+
+# Streaming pipeline: frame source -> voice activity detection -> segments -> recognizer
+
+Segment = collections.namedtuple("Segment", ["index", "start", "end", "audio"])
+Transcript = collections.namedtuple("Transcript", ["index", "start", "end", "text", "full_text"])
+
+
+# Function to split 16-bit PCM bytes into fixed-length frames
+def pcm_frames(pcm, sample_rate=SAMPLE_RATE, frame_ms=FRAME_MS):
+    frame_bytes = int(sample_rate * frame_ms / 1000) * SAMPLE_WIDTH
+    for start in range(0, len(pcm) - frame_bytes + 1, frame_bytes):
+        yield pcm[start:start + frame_bytes]
+
+
+# Function to read a WAV file (path or file object) as (sample_rate, frame generator), mixed down to mono
+def wav_frames(source, frame_ms=FRAME_MS):
+    wav = wave.open(source, "rb")
+    if wav.getsampwidth() != SAMPLE_WIDTH:
+        wav.close()
+        raise ValueError("Only 16-bit PCM WAV audio is supported")
+    sample_rate = wav.getframerate()
+    channels = wav.getnchannels()
+    samples_per_frame = int(sample_rate * frame_ms / 1000)
+
+    def frames():
+        try:
+            while True:
+                data = wav.readframes(samples_per_frame)
+                if len(data) < samples_per_frame * SAMPLE_WIDTH * channels:
+                    break
+                if channels > 1:
+                    samples = np.frombuffer(data, dtype=np.int16).reshape(-1, channels)
+                    data = samples.mean(axis=1).astype(np.int16).tobytes()
+                yield data
+        finally:
+            wav.close()
+
+    return sample_rate, frames()
+
+
+# Function to read frames from the microphone until the generator is closed
+def microphone_frames(sample_rate=SAMPLE_RATE, frame_ms=FRAME_MS):
+    import pyaudio
+
+    samples_per_frame = int(sample_rate * frame_ms / 1000)
+    audio = pyaudio.PyAudio()
+    stream = audio.open(format=pyaudio.paInt16, channels=1, rate=sample_rate, input=True,
+                        frames_per_buffer=samples_per_frame)
+    try:
+        while True:
+            yield stream.read(samples_per_frame, exception_on_overflow=False)
+    finally:
+        stream.stop_stream()
+        stream.close()
+        audio.terminate()
+
+
+# Energy-based voice activity detector with an adaptive noise floor. The floor starts
+# at the level min_energy implies rather than at the first frame, so audio that opens
+# with speech doesn't mistake that speech for the background.
+class EnergyVAD:
+    def __init__(self, ratio=3.0, min_energy=300.0, adapt_rate=0.05):
+        self.ratio = ratio
+        self.min_energy = min_energy
+        self.adapt_rate = adapt_rate
+        self.noise_floor = min_energy / ratio
+
+    def is_speech(self, frame, sample_rate=SAMPLE_RATE):
+        samples = np.frombuffer(frame, dtype=np.int16).astype(np.float32)
+        energy = float(np.sqrt(np.mean(samples * samples))) if len(samples) else 0.0
+        speech = energy > max(self.min_energy, self.noise_floor * self.ratio)
+        # Only track the background level while nobody is speaking
+        if not speech:
+            self.noise_floor += self.adapt_rate * (energy - self.noise_floor)
+        return speech
+
+
+# Sample rates and frame lengths the WebRTC detector accepts
+WEBRTC_SAMPLE_RATES = (8000, 16000, 32000, 48000)
+WEBRTC_FRAME_MS = (10, 20, 30)
+
+
+# WebRTC voice activity detector (needs the optional webrtcvad package;
+# frames must be 10, 20 or 30 ms at 8, 16, 32 or 48 kHz)
+class WebRTCVAD:
+    def __init__(self, aggressiveness=2):
+        import webrtcvad
+        self.vad = webrtcvad.Vad(aggressiveness)
+
+    def is_speech(self, frame, sample_rate=SAMPLE_RATE):
+        return self.vad.is_speech(frame, sample_rate)
+
+
+# Function to pick the WebRTC detector when it is installed and supports the audio
+# format (e.g. not 44.1 or 22.05 kHz WAV files), else the energy detector
+def default_vad(sample_rate=SAMPLE_RATE, frame_ms=FRAME_MS):
+    if sample_rate in WEBRTC_SAMPLE_RATES and frame_ms in WEBRTC_FRAME_MS:
+        try:
+            return WebRTCVAD()
+        except ImportError:
+            pass
+    return EnergyVAD()
+
+
+# Function to group frames into speech segments. A segment starts once most of the
+# last padding_ms of frames are speech and ends once most of them are silence.
+def segment_speech(frames, vad, sample_rate=SAMPLE_RATE, frame_ms=FRAME_MS, padding_ms=300,
+                   trigger_ratio=0.8, min_speech_ms=200):
+    window = collections.deque(maxlen=max(padding_ms // frame_ms, 1))
+    voiced = []
+    triggered = False
+    index = 0
+    position = 0.0
+    start = 0.0
+
+    for frame in frames:
+        speech = vad.is_speech(frame, sample_rate)
+        position += frame_ms / 1000
+        if not triggered:
+            window.append((frame, speech))
+            if sum(1 for _, is_speech in window if is_speech) >= trigger_ratio * window.maxlen:
+                triggered = True
+                start = position - len(window) * frame_ms / 1000
+                voiced = [f for f, _ in window]
+                window.clear()
+        else:
+            voiced.append(frame)
+            window.append((frame, speech))
+            if sum(1 for _, is_speech in window if not is_speech) >= trigger_ratio * window.maxlen:
+                if len(voiced) * frame_ms >= min_speech_ms:
+                    yield Segment(index, round(start, 3), round(position, 3), b"".join(voiced))
+                    index += 1
+                triggered = False
+                voiced = []
+                window.clear()
+
+    # Flush speech still in progress when the stream ends
+    if triggered and len(voiced) * frame_ms >= min_speech_ms:
+        yield Segment(index, round(start, 3), round(position, 3), b"".join(voiced))
+
+
+# Recognizer backends: transcribe(audio bytes, sample_rate) -> text
+
+# Deterministic backend for tests: returns the given transcripts in order,
+# or a description of the segment when none are given
+class StubRecognizer:
+    def __init__(self, transcripts=None):
+        self.transcripts = list(transcripts) if transcripts else None
+        self.calls = 0
+
+    def transcribe(self, audio, sample_rate):
+        self.calls += 1
+        if self.transcripts:
+            return self.transcripts[(self.calls - 1) % len(self.transcripts)]
+        return f"segment {self.calls} ({len(audio) / SAMPLE_WIDTH / sample_rate:.2f}s)"
+
+
+# Offline backend using CMU Sphinx through speech_recognition (needs pocketsphinx)
+class SphinxRecognizer:
+    def __init__(self):
+        self.recognizer = sr.Recognizer()
+
+    def transcribe(self, audio, sample_rate):
+        try:
+            return self.recognizer.recognize_sphinx(sr.AudioData(audio, sample_rate, SAMPLE_WIDTH))
+        except sr.UnknownValueError:
+            return ""
+
+
+# Offline backend using a local Vosk model directory (needs the vosk package)
+class VoskRecognizer:
+    def __init__(self, model_path):
+        import vosk
+        self.vosk = vosk
+        self.model = vosk.Model(model_path)
+
+    def transcribe(self, audio, sample_rate):
+        import json
+        recognizer = self.vosk.KaldiRecognizer(self.model, sample_rate)
+        recognizer.AcceptWaveform(audio)
+        return json.loads(recognizer.FinalResult()).get("text", "")
+
+
+# Online backend matching record_and_transcribe
+class GoogleRecognizer:
+    def __init__(self):
+        self.recognizer = sr.Recognizer()
+
+    def transcribe(self, audio, sample_rate):
+        try:
+            return self.recognizer.recognize_google(sr.AudioData(audio, sample_rate, SAMPLE_WIDTH))
+        except sr.UnknownValueError:
+            return ""
+
+
+# Function to transcribe a frame stream segment by segment. Each finished segment
+# yields a partial Transcript right away, so intent detection can start before
+# the guest stops talking.
+def stream_transcripts(frames, recognizer, sample_rate=SAMPLE_RATE, vad=None, frame_ms=FRAME_MS):
+    vad = vad or default_vad(sample_rate, frame_ms)
+    texts = []
+    for segment in segment_speech(frames, vad, sample_rate, frame_ms):
+        text = recognizer.transcribe(segment.audio, sample_rate).strip()
+        if text:
+            texts.append(text)
+        yield Transcript(segment.index, segment.start, segment.end, text, " ".join(texts))
+
+
+# Function to transcribe a whole WAV file offline
+def transcribe_file(source, recognizer, vad=None):
+    sample_rate, frames = wav_frames(source)
+    full_text = ""
+    for transcript in stream_transcripts(frames, recognizer, sample_rate, vad):
+        full_text = transcript.full_text
+    return full_text
+
+
+# Function to transcribe recorded call audio in bulk, yielding (path, text)
+def transcribe_files(paths, recognizer, vad_factory=EnergyVAD):
+    for path in paths:
+        yield path, transcribe_file(path, recognizer, vad_factory())
+
+
+# Function to stream transcripts from the microphone
+def stream_microphone(recognizer, sample_rate=SAMPLE_RATE, vad=None):
+    return stream_transcripts(microphone_frames(sample_rate), recognizer, sample_rate, vad)
+
+
+if __name__ == "__main__":
+    import sys
+
+    # Bulk offline transcription: python transcribe.py call1.wav call2.wav ...
+    backend = SphinxRecognizer()
+    for path, text in transcribe_files(sys.argv[1:], backend):
+        print(f"{path}: {text}")
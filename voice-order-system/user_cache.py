@@ -0,0 +1,76 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+
+MAX_ENTRIES = int(os.getenv("USER_CACHE_SIZE", "10000"))
+TTL_SECONDS = float(os.getenv("USER_CACHE_TTL", "30"))
+
+
+# LRU + TTL cache of per-user records (the logged-in user and their preferences).
+# Writes must call invalidate(user_id) so the next request reloads from the database.
+# The cache is per process: invalidate() only reaches the worker that made the write,
+# so other workers can serve the old record until its TTL expires. Keep the TTL short
+# enough for that staleness to be acceptable.
+class UserCache:
+    def __init__(self, max_entries=MAX_ENTRIES, ttl=TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, user_id):
+        if self.max_entries <= 0:
+            return None
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is not None:
+                value, expires = entry
+                if expires > time.monotonic():
+                    self.entries.move_to_end(user_id)
+                    self.hits += 1
+                    return value
+                del self.entries[user_id]
+            self.misses += 1
+        return None
+
+    def put(self, user_id, value):
+        if self.max_entries <= 0:
+            return
+        with self.lock:
+            self.entries.pop(user_id, None)
+            self.entries[user_id] = (value, time.monotonic() + self.ttl)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    # Fetch from the cache, falling back to loader(user_id) on a miss; None results are not cached
+    def get_or_load(self, user_id, loader):
+        value = self.get(user_id)
+        if value is None:
+            value = loader(user_id)
+            if value is not None:
+                self.put(user_id, value)
+        return value
+
+    def invalidate(self, user_id):
+        with self.lock:
+            self.entries.pop(user_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
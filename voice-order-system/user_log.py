@@ -1,25 +1,196 @@
 import os
 import datetime
+import queue
+import sqlite3
+import threading
+import time
+import atexit
+
+import metrics
 
 LOG_FILE = os.path.join("logs", "interaction_logs.txt")
 FEEDBACK_FILE = os.path.join("logs", "feedback_logs.txt")
+LOG_DB = os.path.join("instance", "interactions.db")
+
+# Keep writing the plain-text logs alongside the database unless disabled
+TEXT_LOGS_ENABLED = os.getenv("TEXT_LOGS_ENABLED", "1") == "1"
+
+# Flush when this many records are waiting or this many seconds have passed
+QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "200"))
+FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", "1.0"))
+
+WRITE_SECONDS = metrics.histogram("log_write_seconds", "Interaction log batch write (database and text logs)")
+WRITE_BATCH_SIZE = metrics.histogram("log_write_batch_size", "Records per interaction log write",
+                                     buckets=(1, 5, 10, 25, 50, 100, 200, 500, 1000))
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS user_interaction (
+        id INTEGER NOT NULL,
+        "query" VARCHAR(255) NOT NULL,
+        intent VARCHAR(100),
+        sentiment VARCHAR(50),
+        response VARCHAR(255),
+        timestamp DATETIME,
+        path VARCHAR(20),
+        elapsed_ms FLOAT,
+        PRIMARY KEY (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS feedback (
+        id INTEGER NOT NULL,
+        feedback TEXT NOT NULL,
+        timestamp DATETIME,
+        PRIMARY KEY (id)
+    )""",
+]
+
+
+# Background writer: request threads only enqueue records, a single thread
+# batches them into SQLite (WAL mode) and the optional text logs
+class InteractionLogger:
+    def __init__(self, db_path=LOG_DB, text_logs=TEXT_LOGS_ENABLED, queue_size=QUEUE_SIZE,
+                 batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.db_path = db_path
+        self.text_logs = text_logs
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.records = queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.written = 0
+        self.lock = threading.Lock()
+        self.thread = None
+        self.stopping = threading.Event()
+
+    # Queue a record without blocking; when the queue is full the record is dropped and counted
+    def submit(self, kind, *fields):
+        self._ensure_started()
+        try:
+            self.records.put_nowait((kind, datetime.datetime.now()) + fields)
+        except queue.Full:
+            with self.lock:
+                self.dropped += 1
+
+    def stats(self):
+        return {"queued": self.records.qsize(), "written": self.written, "dropped": self.dropped}
+
+    def _ensure_started(self):
+        if self.thread is None:
+            with self.lock:
+                if self.thread is None:
+                    self.thread = threading.Thread(target=self._run, name="interaction-logger", daemon=True)
+                    self.thread.start()
+                    atexit.register(self.close)
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        for statement in SCHEMA:
+            connection.execute(statement)
+        # Older databases predate the routing path and timing columns
+        columns = {row[1] for row in connection.execute("PRAGMA table_info(user_interaction)")}
+        for column, column_type in (("path", "VARCHAR(20)"), ("elapsed_ms", "FLOAT")):
+            if column not in columns:
+                connection.execute(f"ALTER TABLE user_interaction ADD COLUMN {column} {column_type}")
+        connection.commit()
+        return connection
+
+    def _run(self):
+        try:
+            connection = self._connect()
+        except Exception as e:
+            print(f"Error opening interaction log database: {str(e)}")
+            connection = None
+
+        while True:
+            batch = self._collect()
+            if batch:
+                WRITE_BATCH_SIZE.observe(len(batch))
+                with WRITE_SECONDS.time():
+                    self._write(connection, batch)
+            if self.stopping.is_set() and self.records.empty():
+                break
+
+        if connection is not None:
+            connection.close()
+
+    # Block for the first record, then take whatever arrives until the batch is full or the interval ends
+    def _collect(self):
+        batch = []
+        deadline = None
+        while len(batch) < self.batch_size:
+            timeout = self.flush_interval if deadline is None else deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                record = self.records.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_interval
+            batch.append(record)
+        return batch
+
+    def _write(self, connection, batch):
+        interactions = [record[1:] for record in batch if record[0] == "interaction"]
+        feedback = [record[1:] for record in batch if record[0] == "feedback"]
+
+        if connection is not None:
+            try:
+                connection.executemany(
+                    'INSERT INTO user_interaction (timestamp, "query", intent, sentiment, response, path, elapsed_ms) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    [(str(ts), str(q), intent and str(intent), sentiment and str(sentiment), response and str(response),
+                      path, elapsed_ms)
+                     for ts, q, intent, sentiment, response, path, elapsed_ms in interactions])
+                connection.executemany(
+                    "INSERT INTO feedback (timestamp, feedback) VALUES (?, ?)",
+                    [(str(ts), str(text)) for ts, text in feedback])
+                connection.commit()
+            except Exception as e:
+                print(f"Error logging interaction: {str(e)}")
+
+        if self.text_logs:
+            self._write_text(LOG_FILE, [
+                f"[{ts:%Y-%m-%d %H:%M:%S}] Transcription: '{q}' | Intent: {intent} | Sentiment: {sentiment} | Response: {response}"
+                + (f" | Path: {path} | Elapsed: {elapsed_ms:.2f}ms" if path else "") + "\n"
+                for ts, q, intent, sentiment, response, path, elapsed_ms in interactions])
+            self._write_text(FEEDBACK_FILE, [
+                f"[{ts:%Y-%m-%d %H:%M:%S}] Feedback: '{text}'\n" for ts, text in feedback])
+
+        with self.lock:
+            self.written += len(batch)
+
+    def _write_text(self, path, lines):
+        if not lines:
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "a") as log_file:
+                log_file.writelines(lines)
+        except Exception as e:
+            print(f"Error logging interaction: {str(e)}")  # Optionally log to console or a dedicated error log
+
+    # Flush everything still queued and stop the writer thread
+    def close(self, timeout=5.0):
+        if self.thread is None:
+            return
+        self.stopping.set()
+        self.thread.join(timeout)
+
+
+logger = InteractionLogger()
+
+# Queue depth and write/drop totals, reported at scrape time
+def logger_gauges():
+    return {f"interaction_log_{key}": (f"Interaction log records {key}", [({}, value)])
+            for key, value in logger.stats().items()}
 
-def log_interaction(transcription, intent, sentiment, response):
-    os.makedirs(os.path.dirname(LOG_FILE), exist_ok=True)
+metrics.register_collector(logger_gauges)
 
-    try:
-        with open(LOG_FILE, "a") as log_file:
-            timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            log_file.write(f"[{timestamp}] Transcription: '{transcription}' | Intent: {intent} | Sentiment: {sentiment} | Response: {response}\n")
-    except Exception as e:
-        print(f"Error logging interaction: {str(e)}")  # Optionally log to console or a dedicated error log
+def log_interaction(transcription, intent, sentiment, response, path=None, elapsed_ms=None):
+    logger.submit("interaction", transcription, intent, sentiment, response, path, elapsed_ms)
 
 def log_feedback(feedback):
-    os.makedirs(os.path.dirname(FEEDBACK_FILE), exist_ok=True)
-
-    try:
-        with open(FEEDBACK_FILE, "a") as f:
-            timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            f.write(f"[{timestamp}] Feedback: '{feedback}'\n")
-    except Exception as e:
-        print(f"Error logging feedback: {str(e)}")  # Optionally log to console or a dedicated error log
+    logger.submit("feedback", feedback)